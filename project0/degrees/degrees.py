@@ -1,8 +1,17 @@
+import argparse
 import csv
+import itertools
+import random
 import sys
 import time
+from collections import Counter
 
-from util import Node, StackFrontier, QueueFrontier
+from graph import CompactGraph
+from landmarks import LandmarkIndex, astar_shortest_path
+from lookup import NameIndex
+from parallel import separation_stats
+from snapshot import NamesView, PeopleView, load_snapshot, write_snapshot
+from util import Node, DequeStackFrontier, DequeQueueFrontier
 
 # Maps names to a set of corresponding person_ids
 names = {}
@@ -13,11 +22,50 @@ people = {}
 # Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
 movies = {}
 
+# Integer-indexed copy of people and movies, built on first use
+graph = None
 
-def load_data(directory):
+# Prefix and fuzzy search over names, built on first use
+name_search = None
+
+# Similarity a fuzzy match needs to be accepted without asking
+FUZZY_MATCH = 0.8
+
+# Rows read from a CSV file at a time by stream_data
+CHUNK_SIZE = 10000
+
+# Landmark distance index over graph, built or loaded on first use
+landmarks = None
+
+# Number of landmarks picked when building a LandmarkIndex
+LANDMARKS = 16
+
+# Search strategies that main can run; dfs does not guarantee shortest paths
+STRATEGIES = ("bidirectional", "bfs", "compact", "astar", "dfs")
+
+
+def load_data(directory, snapshot=True):
     """
     Load data from CSV files into memory.
+
+    If `snapshot` is true, reuse the binary snapshot stored next to the
+    CSV files when it is up to date, and write one after parsing them.
+
+    Returns a dict counting the star rows read and skipped, which is empty
+    when the snapshot was used.
     """
+    global names, people, movies, graph, name_search
+    if snapshot:
+        data = load_snapshot(directory)
+        if data is not None:
+            names, people, movies = data.names, data.people, data.movies
+            graph = data.graph
+            name_search = None
+            return {}
+    graph = None
+    name_search = None
+    report = Counter()
+
     # Load people
     with open(f"{directory}/people.csv", encoding="utf-8") as f:
         reader = csv.DictReader(f)
@@ -46,22 +94,280 @@ def load_data(directory):
     with open(f"{directory}/stars.csv", encoding="utf-8") as f:
         reader = csv.DictReader(f)
         for row in reader:
+            report["stars read"] += 1
+            if row["person_id"] not in people:
+                report["stars of unknown people"] += 1
+                continue
+            if row["movie_id"] not in movies:
+                report["stars of unknown movies"] += 1
+                continue
+            people[row["person_id"]]["movies"].add(row["movie_id"])
+            movies[row["movie_id"]]["stars"].add(row["person_id"])
+
+    # Save a snapshot for the next run, unless the directory is read-only
+    if snapshot:
+        try:
+            write_snapshot(directory, people, movies, compact_graph())
+        except OSError:
+            pass
+    return dict(report)
+
+
+def stream_data(directory, min_year=None, max_year=None, min_cast=None,
+                chunk_size=CHUNK_SIZE):
+    """
+    Load only part of the CSV files into memory: movies released between
+    `min_year` and `max_year` with at least `min_cast` listed stars, and
+    the people who starred in them. Each file is read `chunk_size` rows
+    at a time.
+
+    Returns a dict counting the rows read and skipped.
+    """
+    global graph, name_search
+    graph = None
+    name_search = None
+    report = Counter()
+
+    # Load movies within the year range
+    for chunk in read_chunks(f"{directory}/movies.csv", chunk_size):
+        for row in chunk:
+            report["movies read"] += 1
             try:
-                people[row["person_id"]]["movies"].add(row["movie_id"])
-                movies[row["movie_id"]]["stars"].add(row["person_id"])
-            except KeyError:
-                pass
+                year = int(row["year"])
+            except ValueError:
+                year = None
+            if ((min_year is not None or max_year is not None) and year is None
+                    or min_year is not None and year < min_year
+                    or max_year is not None and year > max_year):
+                report["movies outside years"] += 1
+                continue
+            movies[row["id"]] = {
+                "title": row["title"],
+                "year": row["year"],
+                "stars": set()
+            }
+
+    # Drop movies with too small a cast, counting each star once and only
+    # if they are in people.csv
+    if min_cast is not None:
+        known = set()
+        for chunk in read_chunks(f"{directory}/people.csv", chunk_size):
+            known.update(row["id"] for row in chunk)
+        cast = {}
+        for chunk in read_chunks(f"{directory}/stars.csv", chunk_size):
+            for row in chunk:
+                if row["movie_id"] in movies and row["person_id"] in known:
+                    cast.setdefault(row["movie_id"], set()).add(row["person_id"])
+        for movie_id in list(movies):
+            if len(cast.get(movie_id, ())) < min_cast:
+                del movies[movie_id]
+                report["movies below cast"] += 1
+        del known, cast
+
+    # Collect the movies of every person starring in a kept movie
+    starring = {}
+    for chunk in read_chunks(f"{directory}/stars.csv", chunk_size):
+        for row in chunk:
+            report["stars read"] += 1
+            if row["movie_id"] not in movies:
+                report["stars of skipped movies"] += 1
+                continue
+            starring.setdefault(row["person_id"], set()).add(row["movie_id"])
+
+    # Load only those people
+    for chunk in read_chunks(f"{directory}/people.csv", chunk_size):
+        for row in chunk:
+            report["people read"] += 1
+            movie_ids = starring.pop(row["id"], None)
+            if movie_ids is None:
+                report["people not in kept movies"] += 1
+                continue
+            people[row["id"]] = {
+                "name": row["name"],
+                "birth": row["birth"],
+                "movies": movie_ids
+            }
+            for movie_id in movie_ids:
+                movies[movie_id]["stars"].add(row["id"])
+            if row["name"].lower() not in names:
+                names[row["name"].lower()] = {row["id"]}
+            else:
+                names[row["name"].lower()].add(row["id"])
+
+    # Whatever is left starred in a kept movie but is not in people.csv
+    report["stars of unknown people"] = sum(
+        len(movie_ids) for movie_ids in starring.values()
+    )
+    return dict(report)
+
+
+def read_chunks(filename, chunk_size):
+    """
+    Yields the rows of a CSV file as lists of up to `chunk_size` dicts.
+    """
+    with open(filename, encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        while True:
+            chunk = list(itertools.islice(reader, chunk_size))
+            if not chunk:
+                return
+            yield chunk
+
+
+def compact_graph():
+    """
+    Returns the CompactGraph of the loaded data, building it if needed.
+    """
+    global graph
+    if graph is None:
+        graph = CompactGraph.from_data(people, movies)
+    return graph
+
+
+def name_index():
+    """
+    Returns the NameIndex of the loaded data, building it if needed.
+    """
+    global name_search
+    if name_search is None:
+        if isinstance(names, NamesView):
+            # Snapshots already keep a sorted index of lowercase names
+            name_search = NameIndex(
+                names.sorted_names,
+                lambda i: graph.person_ids[names.name_people[i]]
+            )
+        else:
+            name_search = NameIndex.from_people(people)
+    return name_search
+
+
+def landmark_index(directory=None, k=LANDMARKS):
+    """
+    Returns the LandmarkIndex of the loaded data. If it is not built yet,
+    reuse the one saved in `directory` or build one with `k` landmarks
+    and save it there.
+    """
+    global landmarks
+    if landmarks is not None:
+        return landmarks
+    if directory is not None:
+        landmarks = LandmarkIndex.load(directory, compact_graph())
+        if landmarks is not None and len(landmarks.landmarks) == k:
+            return landmarks
+    landmarks = LandmarkIndex.build(compact_graph(), k)
+    if directory is not None:
+        try:
+            landmarks.save(directory, compact_graph())
+        except OSError:
+            pass
+    return landmarks
 
 
 def main():
-    if len(sys.argv) > 2:
-        sys.exit("Usage: python degrees.py [directory]")
-    directory = sys.argv[1] if len(sys.argv) == 2 else "large"
+    parser = argparse.ArgumentParser(
+        description="Find degrees of separation between two actors."
+    )
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument(
+        "--batch", metavar="FILE",
+        help="answer the CSV name pairs in FILE ('-' for stdin) instead of "
+             "asking for names"
+    )
+    parser.add_argument(
+        "--source", metavar="NAME",
+        help="with --batch, search from NAME to every name listed in FILE"
+    )
+    parser.add_argument(
+        "--strategy", choices=STRATEGIES, default="bidirectional",
+        help="search strategy to use (default: %(default)s)"
+    )
+    parser.add_argument(
+        "--compare", action="store_true",
+        help="run every strategy and report nodes explored, peak frontier "
+             "size and time for each"
+    )
+    parser.add_argument(
+        "--landmarks", metavar="K", type=int, default=LANDMARKS,
+        help="number of landmarks in the distance index used by astar "
+             "and --distance (default: %(default)s)"
+    )
+    parser.add_argument(
+        "--distance", action="store_true",
+        help="only print the degrees of separation, using the landmark "
+             "index to skip searching where possible"
+    )
+    parser.add_argument(
+        "--stats", metavar="N", type=int,
+        help="print separation statistics from N randomly sampled people "
+             "(or from --source), searching in parallel"
+    )
+    parser.add_argument(
+        "--processes", metavar="P", type=int,
+        help="worker processes for --stats (default: one per CPU)"
+    )
+    parser.add_argument(
+        "--find", metavar="NAME",
+        help="list the people best matching NAME, allowing prefixes and "
+             "typos, and exit"
+    )
+    parser.add_argument(
+        "--min-year", metavar="YEAR", type=int,
+        help="only load movies released in or after YEAR"
+    )
+    parser.add_argument(
+        "--max-year", metavar="YEAR", type=int,
+        help="only load movies released in or before YEAR"
+    )
+    parser.add_argument(
+        "--min-cast", metavar="N", type=int,
+        help="only load movies with at least N listed stars"
+    )
+    args = parser.parse_args()
+    if args.source is not None and args.batch is None and args.stats is None:
+        parser.error("--source requires --batch or --stats")
 
     # Load data from files into memory
-    print("Loading data...")
-    load_data(directory)
-    print("Data loaded.")
+    log = sys.stderr if args.batch else sys.stdout
+    print("Loading data...", file=log)
+    filtered = (args.min_year is not None or args.max_year is not None
+                or args.min_cast is not None)
+    if filtered:
+        report = stream_data(
+            args.directory, args.min_year, args.max_year, args.min_cast
+        )
+    else:
+        report = load_data(args.directory)
+    for key, count in report.items():
+        print(f"  {key}: {count}", file=log)
+    print("Data loaded.", file=log)
+
+    # Saved landmark indexes cover the full dataset only
+    landmarks_directory = None if filtered else args.directory
+
+    if args.find is not None:
+        for person_id, name, birth, score in candidates_for_name(args.find):
+            print(f"ID: {person_id}, Name: {name}, Birth: {birth}, "
+                  f"Score: {score:.2f}")
+        return
+
+    if args.stats is not None:
+        if args.source is not None:
+            source = person_id_for_name(args.source)
+            if source is None:
+                sys.exit("Person not found.")
+            sources = [source]
+        else:
+            sources = random.sample(list(people), min(args.stats, len(people)))
+        print_separation_stats(sources, args.processes)
+        return
+
+    if args.batch is not None:
+        if args.batch == "-":
+            run_batch(sys.stdin, args.source)
+        else:
+            with open(args.batch, encoding="utf-8", newline="") as f:
+                run_batch(f, args.source)
+        return
 
     source = person_id_for_name(input("Name: "))
     if source is None:
@@ -70,57 +376,174 @@ def main():
     if target is None:
         sys.exit("Person not found.")
 
-    stack_frontier = StackFrontier()
-    queue_frontier = QueueFrontier()
-    
-        # Start the timer for StackFrontier
-    start_time_stack = time.time()
-    # Perform the search operation with StackFrontier
-    stack_path = shortest_path(source, target, stack_frontier)
-    # Stop the timer and calculate the elapsed time
-    elapsed_time_stack = time.time() - start_time_stack
-
-    # Start the timer for QueueFrontier
-    start_time_queue = time.time()
-    # Perform the search operation with QueueFrontier
-    queue_path = shortest_path(source, target, queue_frontier)
-    # Stop the timer and calculate the elapsed time
-    elapsed_time_queue = time.time() - start_time_queue
-
-    # Calculate the time difference
-    time_difference = abs(elapsed_time_stack - elapsed_time_queue)
-    print("Stack time is:", elapsed_time_stack, "with", len(stack_path), "degrees of separation.")
-    print("Queue time is:", elapsed_time_queue, "with", len(queue_path), "degrees of separation.")
-    print("Time difference is:", time_difference, "seconds.")
-    
-    # Choose the approach with the least degrees of separation
-    if len(stack_path) < len(queue_path):
-        chosen_path = stack_path
-        print("Chosen method: StackFrontier")
+    if args.distance or args.compare or args.strategy == "astar":
+        landmark_index(landmarks_directory, args.landmarks)
+    if args.distance:
+        degrees = landmark_index().distance(compact_graph(), source, target)
+        if degrees is None:
+            sys.exit("Not connected.")
+        print(f"{degrees} degrees of separation.")
+        return
+
+    if args.compare:
+        path = compare(source, target)
     else:
-        chosen_path = queue_path
-        print("Chosen method: QueueFrontier")
+        path = search(args.strategy, source, target)
+    if path is None:
+        sys.exit("Not connected.")
 
     # Print the degrees of separation
-    degrees = len(chosen_path)
+    degrees = len(path)
     print(f"{degrees} degrees of separation.")
-    chosen_path = [(None, source)] + chosen_path
+    path = [(None, source)] + path
     for i in range(degrees):
-        person1 = people[chosen_path[i][1]]["name"]
-        person2 = people[chosen_path[i + 1][1]]["name"]
-        movie = movies[chosen_path[i + 1][0]]["title"]
+        person1 = people[path[i][1]]["name"]
+        person2 = people[path[i + 1][1]]["name"]
+        movie = movies[path[i + 1][0]]["title"]
         print(f"{i + 1}: {person1} and {person2} starred in {movie}")
 
 
-def shortest_path(source, target, frontier):
+def search(strategy, source, target, stats=None):
+    """
+    Runs one of the STRATEGIES from source to target and returns its
+    list of (movie_id, person_id) pairs, or None if there is no path.
+
+    If `stats` is a dict, the number of people explored and the peak
+    frontier size are recorded in it.
+    """
+    if strategy == "bidirectional":
+        if isinstance(people, PeopleView):
+            # Snapshot views decode ids on every lookup, so search the
+            # graph's index arrays instead
+            return compact_graph().bidirectional_shortest_path(
+                source, target, stats
+            )
+        return bidirectional_shortest_path(source, target, stats)
+    elif strategy == "bfs":
+        return shortest_path(source, target, DequeQueueFrontier(), stats)
+    elif strategy == "dfs":
+        return shortest_path(source, target, DequeStackFrontier(), stats)
+    elif strategy == "compact":
+        return compact_graph().shortest_path(source, target, stats)
+    elif strategy == "astar":
+        return astar_shortest_path(
+            compact_graph(), landmark_index(), source, target, stats
+        )
+    raise ValueError(f"unknown strategy {strategy}")
+
+
+def compare(source, target):
+    """
+    Runs every strategy from source to target, prints how much work each
+    did, and returns the shortest path found.
+    """
+    best = None
+    print(f"{'Strategy':<14}{'Degrees':>8}{'Explored':>10}{'Peak':>10}{'Time (s)':>10}")
+    for strategy in STRATEGIES:
+        stats = {}
+        start = time.perf_counter()
+        path = search(strategy, source, target, stats)
+        elapsed = time.perf_counter() - start
+        degrees = "-" if path is None else len(path)
+        print(f"{strategy:<14}{degrees:>8}{stats['explored']:>10}"
+              f"{stats['peak_frontier']:>10}{elapsed:>10.4f}")
+        if path is not None and (best is None or len(path) < len(best)):
+            best = path
+    return best
+
+
+def print_separation_stats(sources, processes=None):
+    """
+    Searches from every person_id in `sources` in parallel and prints how
+    far each is from everyone else, then the combined distribution.
+    """
+    graph = compact_graph()
+    results = separation_stats(
+        graph, [graph.person_index(source) for source in sources], processes
+    )
+    total = Counter()
+    for s, result in sorted(results.items()):
+        name = people[graph.person_ids[s]]["name"]
+        print(f"{name}: reaches {result['reached']} people, "
+              f"eccentricity {result['eccentricity']}, "
+              f"mean {result['mean']:.2f} degrees")
+        total.update(result["histogram"])
+    print("Degrees of separation across all sources:")
+    for degrees in sorted(total):
+        print(f"  {degrees}: {total[degrees]}")
+
+
+def run_batch(lines, source=None, out=sys.stdout):
+    """
+    Answers every query in the CSV `lines` against the loaded data,
+    writing a CSV row of source, target, degrees and path for each.
+
+    Each row holds a source and a target name, or just a target name if
+    `source` is given. Queries sharing a source are answered with a
+    single breadth-first search.
+    """
+    queries = []
+    for row in csv.reader(lines):
+        if not row or not "".join(row).strip():
+            continue
+        if source is not None:
+            queries.append((source, row[0].strip()))
+        elif len(row) >= 2:
+            queries.append((row[0].strip(), row[1].strip()))
+        else:
+            queries.append((row[0].strip(), ""))
+
+    # Resolve names once and group targets by source
+    ids = {}
+    for query in queries:
+        for name in query:
+            if name not in ids:
+                ids[name] = person_id_for_name(name, interactive=False)
+    targets = {}
+    for source_name, target_name in queries:
+        source_id, target_id = ids[source_name], ids[target_name]
+        if source_id is not None and target_id is not None:
+            targets.setdefault(source_id, set()).add(target_id)
+
+    paths = {}
+    for source_id in targets:
+        for target_id, path in compact_graph().paths_from(
+            source_id, targets[source_id]
+        ).items():
+            paths[source_id, target_id] = path
+
+    writer = csv.writer(out)
+    writer.writerow(["source", "target", "degrees", "path"])
+    for source_name, target_name in queries:
+        source_id, target_id = ids[source_name], ids[target_name]
+        if source_id is None or target_id is None:
+            writer.writerow([source_name, target_name, "", "person not found"])
+            continue
+        path = paths[source_id, target_id]
+        if path is None:
+            writer.writerow([source_name, target_name, "", "not connected"])
+            continue
+        steps = [people[source_id]["name"]]
+        for movie_id, person_id in path:
+            steps.append(movies[movie_id]["title"])
+            steps.append(people[person_id]["name"])
+        writer.writerow([source_name, target_name, len(path), " > ".join(steps)])
+
+
+def shortest_path(source, target, frontier, stats=None):
     """
     Returns the shortest list of (movie_id, person_id) pairs
     that connect the source to the target.
 
     If no possible path, returns None.
     """
-    # Keep track of number of states explored
+    # Keep track of number of states explored and the largest frontier
     num_explored = 0
+    peak_frontier = 0
+    if source == target:
+        if stats is not None:
+            stats.update(explored=num_explored, peak_frontier=peak_frontier)
+        return []
     
     # Initialize frontier to just the starting position
     start = Node(state=source, parent=None, action=None)
@@ -133,9 +556,12 @@ def shortest_path(source, target, frontier):
     while True:
         # If nothing left in frontier, then no path
         if frontier.empty():
-            raise Exception("no solution")
+            if stats is not None:
+                stats.update(explored=num_explored, peak_frontier=peak_frontier)
+            return None
         
         # Choose a node from the frontier
+        peak_frontier = max(peak_frontier, len(frontier.frontier))
         node = frontier.remove()
         num_explored += 1
         
@@ -163,35 +589,151 @@ def shortest_path(source, target, frontier):
                     x = zip(movies, people)
                     for movie, person in x:
                         solution.append((movie, person))     
+                    if stats is not None:
+                        stats.update(explored=num_explored, peak_frontier=peak_frontier)
                     return solution
 
 
-def person_id_for_name(name):
+def bidirectional_shortest_path(source, target, stats=None):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs
+    that connect the source to the target, growing one breadth-first
+    frontier from the source and one from the target until they meet.
+
+    If no possible path, returns None.
+    """
+    if stats is None:
+        stats = {}
+    stats.update(explored=0, peak_frontier=0)
+    if source == target:
+        return []
+
+    # Map each reached person to the (movie_id, person_id) step that
+    # reached it: towards the source going forward, towards the target
+    # going backward
+    forward = {source: None}
+    backward = {target: None}
+    forward_frontier = [source]
+    backward_frontier = [target]
+
+    # Keep expanding until one side runs out of people to visit
+    while forward_frontier and backward_frontier:
+        stats["peak_frontier"] = max(
+            stats["peak_frontier"],
+            len(forward_frontier) + len(backward_frontier)
+        )
+
+        # Always grow the smaller frontier by one full layer
+        if len(forward_frontier) <= len(backward_frontier):
+            meeting, forward_frontier = expand_layer(
+                forward_frontier, forward, backward, stats
+            )
+        else:
+            meeting, backward_frontier = expand_layer(
+                backward_frontier, backward, forward, stats
+            )
+
+        # If the two searches met, join their halves into one path
+        if meeting is not None:
+            solution = []
+            person_id = meeting
+            while forward[person_id] is not None:
+                movie_id, parent = forward[person_id]
+                solution.append((movie_id, person_id))
+                person_id = parent
+            solution.reverse()
+            person_id = meeting
+            while backward[person_id] is not None:
+                movie_id, person_id = backward[person_id]
+                solution.append((movie_id, person_id))
+            return solution
+
+    return None
+
+
+def expand_layer(frontier, parents, other_parents, stats):
+    """
+    Expands every person in `frontier` by one step, recording how each
+    new person was reached in `parents`.
+
+    Returns a tuple of the first person already reached by the other
+    search (or None) and the next frontier layer.
+    """
+    next_frontier = []
+    for person_id in frontier:
+        stats["explored"] += 1
+        for movie_id, neighbor in neighbors_for_person(person_id):
+            if neighbor in parents:
+                continue
+            parents[neighbor] = (movie_id, person_id)
+            if neighbor in other_parents:
+                return neighbor, next_frontier
+            next_frontier.append(neighbor)
+    return None, next_frontier
+
+
+def person_id_for_name(name, interactive=True):
     """
     Returns the IMDB id for a person's name,
     resolving ambiguities as needed.
+
+    Names without an exact match fall back to the closest names in the
+    name index. If `interactive` is false, nothing is asked: ambiguous
+    names return None and a close match is only accepted if it is clearly
+    the best one.
     """
     person_ids = list(names.get(name.lower(), set()))
     if len(person_ids) == 0:
-        return None
+        candidates = name_index().search(name)
+        if not interactive:
+            if candidates and candidates[0][0] >= FUZZY_MATCH and (
+                len(candidates) == 1 or candidates[1][0] < candidates[0][0]
+            ):
+                return candidates[0][1]
+            return None
+        if len(candidates) == 0:
+            return None
+        print(f"No exact match for '{name}'. Did you mean:")
+        return choose_person([person_id for _, person_id in candidates])
     elif len(person_ids) > 1:
+        if not interactive:
+            return None
         print(f"Which '{name}'?")
-        for person_id in person_ids:
-            person = people[person_id]
-            name = person["name"]
-            birth = person["birth"]
-            print(f"ID: {person_id}, Name: {name}, Birth: {birth}")
-        try:
-            person_id = input("Intended Person ID: ")
-            if person_id in person_ids:
-                return person_id
-        except ValueError:
-            pass
-        return None
+        return choose_person(person_ids)
     else:
         return person_ids[0]
 
 
+def choose_person(person_ids):
+    """
+    Lists `person_ids` with their birth years and asks which one was meant.
+    """
+    for person_id in person_ids:
+        person = people[person_id]
+        name = person["name"]
+        birth = person["birth"]
+        print(f"ID: {person_id}, Name: {name}, Birth: {birth}")
+    try:
+        person_id = input("Intended Person ID: ")
+        if person_id in person_ids:
+            return person_id
+    except ValueError:
+        pass
+    return None
+
+
+def candidates_for_name(name, limit=10):
+    """
+    Returns up to `limit` (person_id, name, birth, score) tuples for the
+    people best matching `name`, best first.
+    """
+    candidates = []
+    for score, person_id in name_index().search(name, limit):
+        person = people[person_id]
+        candidates.append((person_id, person["name"], person["birth"], score))
+    return candidates
+
+
 def neighbors_for_person(person_id):
     """
     Returns (movie_id, person_id) pairs for people
@@ -0,0 +1,304 @@
+from array import array
+from bisect import bisect_left
+from collections import deque
+
+# Distance recorded for people a search cannot reach
+UNREACHABLE = 255
+
+
+class CompactGraph():
+    """
+    Actor/movie graph with people and movies interned to dense integers.
+
+    People and movies are numbered in sorted id order. Adjacency is stored
+    in compressed sparse row form: the movies of person `p` are
+    `person_movies[person_offsets[p]:person_offsets[p + 1]]` and the stars
+    of movie `m` are `movie_people[movie_offsets[m]:movie_offsets[m + 1]]`.
+    """
+
+    def __init__(self, person_ids, movie_ids, person_offsets, person_movies,
+                 movie_offsets, movie_people):
+        self.person_ids = person_ids
+        self.movie_ids = movie_ids
+        self.person_offsets = person_offsets
+        self.person_movies = person_movies
+        self.movie_offsets = movie_offsets
+        self.movie_people = movie_people
+
+    @classmethod
+    def from_data(cls, people, movies):
+        """
+        Builds a compact graph from the `people` and `movies` maps
+        filled in by `degrees.load_data`.
+        """
+        person_ids = sorted(people)
+        movie_ids = sorted(movies)
+        person_index = {person_id: i for i, person_id in enumerate(person_ids)}
+        movie_index = {movie_id: i for i, movie_id in enumerate(movie_ids)}
+
+        person_offsets, person_movies = cls._adjacency(
+            person_ids, movie_index,
+            lambda person_id: people[person_id]["movies"]
+        )
+        movie_offsets, movie_people = cls._adjacency(
+            movie_ids, person_index,
+            lambda movie_id: movies[movie_id]["stars"]
+        )
+        return cls(person_ids, movie_ids, person_offsets, person_movies,
+                   movie_offsets, movie_people)
+
+    @staticmethod
+    def _adjacency(ids, index, edges_for):
+        """
+        Returns the offsets and targets arrays of one side of the graph.
+        """
+        offsets = array("i", [0])
+        targets = array("i")
+        for key in ids:
+            targets.extend(sorted(index[other] for other in edges_for(key)))
+            offsets.append(len(targets))
+        return offsets, targets
+
+    def __len__(self):
+        return len(self.person_ids)
+
+    def person_index(self, person_id):
+        """
+        Returns the dense index of a person id, or None if unknown.
+        """
+        i = bisect_left(self.person_ids, person_id)
+        if i < len(self.person_ids) and self.person_ids[i] == person_id:
+            return i
+        return None
+
+    def movie_index(self, movie_id):
+        """
+        Returns the dense index of a movie id, or None if unknown.
+        """
+        i = bisect_left(self.movie_ids, movie_id)
+        if i < len(self.movie_ids) and self.movie_ids[i] == movie_id:
+            return i
+        return None
+
+    def shortest_path(self, source, target, stats=None):
+        """
+        Returns the shortest list of (movie_id, person_id) pairs
+        that connect the source to the target.
+
+        If no possible path, returns None.
+        """
+        return self.paths_from(source, [target], stats).get(target)
+
+    def paths_from(self, source, targets, stats=None):
+        """
+        Runs one breadth-first search from the source and returns a dict
+        mapping each target to its shortest list of (movie_id, person_id)
+        pairs, or to None if it cannot be reached.
+
+        The search stops as soon as every target has been reached. If
+        `stats` is a dict, the number of people explored and the peak
+        frontier size are recorded in it.
+        """
+        if stats is None:
+            stats = {}
+        stats.update(explored=0, peak_frontier=0)
+        paths = {target: None for target in targets}
+        s = self.person_index(source)
+        if s is None:
+            return paths
+
+        # Dense indices of the targets still to be found
+        remaining = {}
+        for target in targets:
+            t = self.person_index(target)
+            if t == s:
+                paths[target] = []
+            elif t is not None:
+                remaining.setdefault(t, []).append(target)
+        if not remaining:
+            return paths
+
+        person_offsets = self.person_offsets
+        person_movies = self.person_movies
+        movie_offsets = self.movie_offsets
+        movie_people = self.movie_people
+
+        # Movie that first reached each person, and person that first
+        # reached each movie; -1 marks not yet reached
+        reached_by = array("i", [-1]) * len(self.person_ids)
+        movie_parent = array("i", [-1]) * len(self.movie_ids)
+        reached_by[s] = len(self.movie_ids)
+
+        explored = 0
+        peak_frontier = 0
+        frontier = deque([s])
+        while frontier:
+            explored += 1
+            if len(frontier) > peak_frontier:
+                peak_frontier = len(frontier)
+            p = frontier.popleft()
+            for i in range(person_offsets[p], person_offsets[p + 1]):
+                m = person_movies[i]
+
+                # Every star of a movie is reached the first time the
+                # movie is, so each movie only needs expanding once
+                if movie_parent[m] != -1:
+                    continue
+                movie_parent[m] = p
+
+                for j in range(movie_offsets[m], movie_offsets[m + 1]):
+                    q = movie_people[j]
+                    if reached_by[q] != -1:
+                        continue
+                    reached_by[q] = m
+                    if q in remaining:
+                        path = self._path(s, q, reached_by, movie_parent)
+                        for target in remaining.pop(q):
+                            paths[target] = list(path)
+                        if not remaining:
+                            stats.update(
+                                explored=explored, peak_frontier=peak_frontier
+                            )
+                            return paths
+                    frontier.append(q)
+
+        stats.update(explored=explored, peak_frontier=peak_frontier)
+        return paths
+
+    def bidirectional_shortest_path(self, source, target, stats=None):
+        """
+        Returns the shortest list of (movie_id, person_id) pairs that
+        connect the source to the target, growing one breadth-first
+        frontier from each end until they meet.
+
+        If no possible path, returns None.
+        """
+        if stats is None:
+            stats = {}
+        stats.update(explored=0, peak_frontier=0)
+        s = self.person_index(source)
+        t = self.person_index(target)
+        if s is None or t is None:
+            return None
+        if s == t:
+            return []
+
+        # Map each reached person index to the (movie, person) step that
+        # reached it, going forward from s and backward from t. Searches
+        # usually meet after touching a small part of the graph, so dicts
+        # beat arrays sized to the whole graph here
+        forward = {s: None}
+        backward = {t: None}
+        forward_seen = set()
+        backward_seen = set()
+        forward_frontier = [s]
+        backward_frontier = [t]
+
+        while forward_frontier and backward_frontier:
+            stats["peak_frontier"] = max(
+                stats["peak_frontier"],
+                len(forward_frontier) + len(backward_frontier)
+            )
+
+            # Always grow the smaller frontier by one full layer
+            if len(forward_frontier) <= len(backward_frontier):
+                meeting, forward_frontier = self._expand_layer(
+                    forward_frontier, forward, forward_seen, backward, stats
+                )
+            else:
+                meeting, backward_frontier = self._expand_layer(
+                    backward_frontier, backward, backward_seen, forward, stats
+                )
+
+            if meeting is not None:
+                solution = []
+                q = meeting
+                while forward[q] is not None:
+                    m, p = forward[q]
+                    solution.append((self.movie_ids[m], self.person_ids[q]))
+                    q = p
+                solution.reverse()
+                q = meeting
+                while backward[q] is not None:
+                    m, p = backward[q]
+                    solution.append((self.movie_ids[m], self.person_ids[p]))
+                    q = p
+                return solution
+
+        return None
+
+    def _expand_layer(self, frontier, parents, seen, other_parents, stats):
+        """
+        Expands every person index in `frontier` by one step for one side
+        of bidirectional_shortest_path, recording in `parents` how each
+        new person was reached and in `seen` which movies were expanded.
+
+        Returns a tuple of the first person already reached by the other
+        side (or None) and the next frontier layer.
+        """
+        person_offsets = self.person_offsets
+        person_movies = self.person_movies
+        movie_offsets = self.movie_offsets
+        movie_people = self.movie_people
+        next_frontier = []
+        for p in frontier:
+            stats["explored"] += 1
+            for i in range(person_offsets[p], person_offsets[p + 1]):
+                m = person_movies[i]
+                if m in seen:
+                    continue
+                seen.add(m)
+                for j in range(movie_offsets[m], movie_offsets[m + 1]):
+                    q = movie_people[j]
+                    if q in parents:
+                        continue
+                    parents[q] = (m, p)
+                    if q in other_parents:
+                        return q, next_frontier
+                    next_frontier.append(q)
+        return None, next_frontier
+
+    def distances(self, s):
+        """
+        Returns a bytearray of the number of hops from person index `s`
+        to every person, with UNREACHABLE for people it cannot reach.
+        """
+        person_offsets = self.person_offsets
+        person_movies = self.person_movies
+        movie_offsets = self.movie_offsets
+        movie_people = self.movie_people
+
+        distance = bytearray([UNREACHABLE]) * len(self.person_ids)
+        movie_seen = bytearray(len(self.movie_ids))
+        distance[s] = 0
+        layer = [s]
+        depth = 0
+        while layer:
+            depth = min(depth + 1, UNREACHABLE - 1)
+            next_layer = []
+            for p in layer:
+                for i in range(person_offsets[p], person_offsets[p + 1]):
+                    m = person_movies[i]
+                    if movie_seen[m]:
+                        continue
+                    movie_seen[m] = 1
+                    for j in range(movie_offsets[m], movie_offsets[m + 1]):
+                        q = movie_people[j]
+                        if distance[q] == UNREACHABLE:
+                            distance[q] = depth
+                            next_layer.append(q)
+            layer = next_layer
+        return distance
+
+    def _path(self, s, t, reached_by, movie_parent):
+        """
+        Walks the BFS parent arrays back from `t` to `s`.
+        """
+        solution = []
+        q = t
+        while q != s:
+            m = reached_by[q]
+            solution.append((self.movie_ids[m], self.person_ids[q]))
+            q = movie_parent[m]
+        solution.reverse()
+        return solution
@@ -0,0 +1,233 @@
+import heapq
+import json
+import mmap
+import os
+import struct
+
+from graph import UNREACHABLE
+from snapshot import source_signature
+
+# Bump whenever the file layout changes so old indexes are rebuilt
+LANDMARKS_VERSION = 1
+LANDMARKS_NAME = "degrees.landmarks"
+
+MAGIC = b"DEGLMRK\0"
+HEADER = struct.Struct("<8sI")
+
+
+class LandmarkIndex():
+    """
+    Hop distances from a few well-connected landmark people to everyone.
+
+    By the triangle inequality, for any landmark L the distance between
+    two people x and y lies between |d(L, x) - d(L, y)| and
+    d(L, x) + d(L, y), which gives instant bounds and an admissible A*
+    heuristic.
+    """
+
+    def __init__(self, landmarks, distances):
+        self.landmarks = landmarks
+        self.distances = distances
+
+    @classmethod
+    def build(cls, graph, k):
+        """
+        Picks the `k` people with the most co-star links in `graph` as
+        landmarks and runs a breadth-first search from each.
+        """
+        def links(p):
+            total = 0
+            for i in range(graph.person_offsets[p], graph.person_offsets[p + 1]):
+                m = graph.person_movies[i]
+                total += graph.movie_offsets[m + 1] - graph.movie_offsets[m] - 1
+            return total
+
+        landmarks = heapq.nlargest(k, range(len(graph)), key=links)
+        distances = [graph.distances(landmark) for landmark in landmarks]
+        return cls(landmarks, distances)
+
+    def bounds(self, s, t):
+        """
+        Returns (lower, upper) bounds on the hops between person indices
+        `s` and `t`. `upper` is None if no landmark gives one, and both
+        are None if the landmarks show that `s` and `t` are not connected.
+        """
+        lower = 0
+        upper = None
+        for distance in self.distances:
+            ds, dt = distance[s], distance[t]
+            if ds == UNREACHABLE and dt == UNREACHABLE:
+                continue
+            if ds == UNREACHABLE or dt == UNREACHABLE:
+                return None, None
+            lower = max(lower, abs(ds - dt))
+            if upper is None or ds + dt < upper:
+                upper = ds + dt
+        return lower, upper
+
+    def heuristic(self, t):
+        """
+        Returns a function estimating the hops from any person index to
+        `t`, never overestimating them.
+        """
+        columns = [
+            (distance, distance[t]) for distance in self.distances
+            if distance[t] != UNREACHABLE
+        ]
+
+        def estimate(p):
+            best = 0
+            for distance, dt in columns:
+                dp = distance[p]
+                if dp != UNREACHABLE and abs(dp - dt) > best:
+                    best = abs(dp - dt)
+            return best
+
+        return estimate
+
+    def distance(self, graph, source, target):
+        """
+        Returns the degrees of separation between two person ids, or None
+        if they are not connected, searching only when the landmark
+        bounds do not already agree.
+        """
+        s = graph.person_index(source)
+        t = graph.person_index(target)
+        if s is None or t is None:
+            return None
+        if s == t:
+            return 0
+        lower, upper = self.bounds(s, t)
+        if lower is None:
+            return None
+        if lower == upper:
+            return lower
+        path = astar_shortest_path(graph, self, source, target)
+        return None if path is None else len(path)
+
+    def save(self, directory, graph):
+        """
+        Writes the index next to the CSV files in `directory`.
+        """
+        header = json.dumps({
+            "version": LANDMARKS_VERSION,
+            "source": source_signature(directory),
+            "people": len(graph),
+            "landmarks": [graph.person_ids[p] for p in self.landmarks],
+        }).encode("utf-8")
+        path = os.path.join(directory, LANDMARKS_NAME)
+        temporary = f"{path}.tmp"
+        with open(temporary, "wb") as f:
+            f.write(HEADER.pack(MAGIC, len(header)))
+            f.write(header)
+            for distance in self.distances:
+                f.write(distance)
+        os.replace(temporary, path)
+
+    @classmethod
+    def load(cls, directory, graph):
+        """
+        Returns the index stored next to the CSV files in `directory`, or
+        None if there is none or it is out of date.
+        """
+        try:
+            with open(os.path.join(directory, LANDMARKS_NAME), "rb") as f:
+                buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+
+        try:
+            magic, header_length = HEADER.unpack_from(buffer)
+            if magic != MAGIC:
+                return None
+            start = HEADER.size + header_length
+            header = json.loads(buffer[HEADER.size:start])
+            n = header["people"]
+            if (header["version"] != LANDMARKS_VERSION
+                    or header["source"] != source_signature(directory)
+                    or n != len(graph)
+                    or len(buffer) != start + n * len(header["landmarks"])):
+                return None
+            landmarks = [graph.person_index(person_id)
+                         for person_id in header["landmarks"]]
+            if None in landmarks:
+                return None
+        except (struct.error, ValueError, KeyError, TypeError, OSError):
+            return None
+
+        view = memoryview(buffer)
+        distances = [view[start + i * n:start + (i + 1) * n]
+                     for i in range(len(landmarks))]
+        return cls(landmarks, distances)
+
+
+def astar_shortest_path(graph, index, source, target, stats=None):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs that connect
+    the source to the target, using A* search on `graph` guided by the
+    landmark bounds in `index`.
+
+    If no possible path, returns None.
+    """
+    if stats is None:
+        stats = {}
+    stats.update(explored=0, peak_frontier=0)
+    s = graph.person_index(source)
+    t = graph.person_index(target)
+    if s is None or t is None:
+        return None
+    if s == t:
+        return []
+    lower, _ = index.bounds(s, t)
+    if lower is None:
+        return None
+
+    person_offsets = graph.person_offsets
+    person_movies = graph.person_movies
+    movie_offsets = graph.movie_offsets
+    movie_people = graph.movie_people
+    estimate = index.heuristic(t)
+
+    # Best known hops to each person and the step that achieved it, and
+    # the hops at which each movie was last expanded
+    cost = {s: 0}
+    reached_by = {s: None}
+    movie_cost = {}
+
+    # Order by estimated total hops, preferring people further along
+    frontier = [(estimate(s), 0, s)]
+    while frontier:
+        stats["peak_frontier"] = max(stats["peak_frontier"], len(frontier))
+        _, g, p = heapq.heappop(frontier)
+        g = -g
+        if g > cost[p]:
+            continue
+        stats["explored"] += 1
+
+        # If person is the goal, then we have a solution
+        if p == t:
+            solution = []
+            while reached_by[p] is not None:
+                m, parent = reached_by[p]
+                solution.append((graph.movie_ids[m], graph.person_ids[p]))
+                p = parent
+            solution.reverse()
+            return solution
+
+        for i in range(person_offsets[p], person_offsets[p + 1]):
+            m = person_movies[i]
+
+            # A movie only needs expanding again if reached more cheaply
+            if m in movie_cost and movie_cost[m] <= g:
+                continue
+            movie_cost[m] = g
+
+            for j in range(movie_offsets[m], movie_offsets[m + 1]):
+                q = movie_people[j]
+                if q in cost and cost[q] <= g + 1:
+                    continue
+                cost[q] = g + 1
+                reached_by[q] = (m, p)
+                heapq.heappush(frontier, (g + 1 + estimate(q), -g - 1, q))
+
+    return None
@@ -0,0 +1,144 @@
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from difflib import SequenceMatcher
+
+# Fuzzy candidates rescored with SequenceMatcher per query
+FUZZY_CANDIDATES = 50
+
+# Similarity below which fuzzy candidates are dropped
+MIN_SIMILARITY = 0.5
+
+
+class NameIndex():
+    """
+    Prefix and typo-tolerant search over lowercase person names.
+
+    `keys` is a sorted sequence of lowercase names and `person_id_at(i)`
+    returns the person_id of `keys[i]`. A trigram index over the distinct
+    names is built the first time a fuzzy search needs it.
+    """
+
+    def __init__(self, keys, person_id_at):
+        self.keys = keys
+        self.person_id_at = person_id_at
+        self.distinct = None
+        self.trigrams = None
+
+    @classmethod
+    def from_people(cls, people):
+        """
+        Builds an index from a `people` map of person_ids to dicts with
+        a "name".
+        """
+        entries = sorted(
+            (person["name"].lower(), person_id)
+            for person_id, person in people.items()
+        )
+        keys = [key for key, _ in entries]
+        person_ids = [person_id for _, person_id in entries]
+        return cls(keys, person_ids.__getitem__)
+
+    def exact(self, name):
+        """
+        Returns the person_ids whose name is exactly `name`.
+        """
+        name = name.lower()
+        return [person_id for _, person_id in self._run(name, name.__eq__)]
+
+    def prefix(self, text, limit=None):
+        """
+        Returns up to `limit` (name, person_id) pairs whose name starts
+        with `text`, in name order.
+        """
+        text = text.lower()
+        return list(self._run(
+            text, lambda key: key.startswith(text), limit
+        ))
+
+    def _run(self, text, matches, limit=None):
+        """
+        Yields (name, person_id) pairs for the run of sorted keys from
+        `text` onwards that `matches` accepts.
+        """
+        i = bisect_left(self.keys, text)
+        end = len(self.keys) if limit is None else min(len(self.keys), i + limit)
+        while i < end and matches(self.keys[i]):
+            yield self.keys[i], self.person_id_at(i)
+            i += 1
+
+    def fuzzy(self, text, limit=10):
+        """
+        Returns up to `limit` (score, name) pairs for the distinct names
+        most similar to `text`, best first, with scores between 0 and 1.
+        """
+        text = text.lower()
+        if self.trigrams is None:
+            self._build_trigrams()
+
+        # Count the trigrams each name shares with the query
+        shared = Counter()
+        for trigram in set(trigrams(text)):
+            shared.update(self.trigrams.get(trigram, ()))
+
+        scored = []
+        for i, _ in shared.most_common(FUZZY_CANDIDATES):
+            name = self.distinct[i]
+            scored.append((SequenceMatcher(None, text, name).ratio(), name))
+        scored.sort(key=lambda candidate: (-candidate[0], candidate[1]))
+        return scored[:limit]
+
+    def _build_trigrams(self):
+        """
+        Indexes every distinct name by the trigrams it contains.
+        """
+        distinct = []
+        index = {}
+        previous = None
+        for key in self.keys:
+            if key == previous:
+                continue
+            previous = key
+            for trigram in set(trigrams(key)):
+                if trigram not in index:
+                    index[trigram] = array("i")
+                index[trigram].append(len(distinct))
+            distinct.append(key)
+        self.distinct = distinct
+        self.trigrams = index
+
+    def search(self, text, limit=10):
+        """
+        Returns up to `limit` (score, person_id) pairs for `text`, best
+        first: exact matches score 1, names starting with `text` and
+        similar names score by how much of the name they match. Each
+        person keeps the best score any of these gives them.
+        """
+        text = text.lower().strip()
+        if not text:
+            return []
+        best = {}
+
+        def add(score, person_id):
+            if score > best.get(person_id, 0):
+                best[person_id] = score
+
+        for name, person_id in self.prefix(text, limit):
+            add(1.0 if name == text else len(text) / len(name), person_id)
+        for score, name in self.fuzzy(text, limit):
+            if score < MIN_SIMILARITY:
+                break
+            for person_id in self.exact(name):
+                add(score, person_id)
+        results = [(score, person_id) for person_id, score in best.items()]
+        results.sort(key=lambda result: -result[0])
+        return results[:limit]
+
+
+def trigrams(text):
+    """
+    Returns the three-character substrings of `text`, padded so that the
+    start and end of the text count too.
+    """
+    padded = f"  {text} "
+    return [padded[i:i + 3] for i in range(len(padded) - 2)]
@@ -0,0 +1,92 @@
+import multiprocessing
+from collections import Counter
+from multiprocessing import shared_memory
+
+from graph import CompactGraph, UNREACHABLE
+
+# Adjacency arrays copied into shared memory, in layout order
+ARRAYS = ("person_offsets", "person_movies", "movie_offsets", "movie_people")
+
+# Graph attached by each worker process in _attach
+worker_graph = None
+
+
+def share_graph(graph):
+    """
+    Copies the adjacency arrays of `graph` into one shared memory block.
+
+    Returns the block and a layout of (name, typecode, offset, length)
+    entries that workers use to attach to it.
+    """
+    layout = []
+    size = 0
+    for name in ARRAYS:
+        data = memoryview(getattr(graph, name))
+        layout.append((name, data.format, size, data.nbytes))
+        size += -(-data.nbytes // 8) * 8
+
+    block = shared_memory.SharedMemory(create=True, size=max(size, 1))
+    for name, _, offset, length in layout:
+        block.buf[offset:offset + length] = memoryview(getattr(graph, name)).cast("B")
+    return block, layout
+
+
+def _attach(name, layout, people, movies):
+    """
+    Pool initializer: maps the shared graph into this worker process.
+    """
+    global worker_graph
+    block = shared_memory.SharedMemory(name=name)
+    arrays = {
+        array_name: block.buf[offset:offset + length].cast(typecode)
+        for array_name, typecode, offset, length in layout
+    }
+
+    # Workers only deal in dense indices, so ids are plain ranges
+    worker_graph = CompactGraph(range(people), range(movies), **arrays)
+    worker_graph.block = block
+
+
+def _source_stats(s):
+    """
+    Runs a breadth-first search from person index `s` in the worker and
+    returns `s` with a Counter of how many people are at each distance.
+    """
+    histogram = Counter(worker_graph.distances(s))
+    return s, histogram
+
+
+def separation_stats(graph, sources, processes=None):
+    """
+    Runs a breadth-first search from every person index in `sources`
+    across a pool of worker processes sharing `graph`.
+
+    Returns a dict mapping each source to a dict of: reached (number of
+    other people it connects to), eccentricity (largest distance to any of
+    them), mean (average distance to them) and histogram (a Counter of
+    people per distance).
+    """
+    block, layout = share_graph(graph)
+    try:
+        with multiprocessing.Pool(
+            processes,
+            initializer=_attach,
+            initargs=(block.name, layout, len(graph.person_ids),
+                      len(graph.movie_ids))
+        ) as pool:
+            results = {}
+            for s, histogram in pool.imap_unordered(_source_stats, sources):
+                del histogram[UNREACHABLE]
+                del histogram[0]
+                reached = sum(histogram.values())
+                results[s] = {
+                    "reached": reached,
+                    "eccentricity": max(histogram, default=0),
+                    "mean": (sum(d * n for d, n in histogram.items()) / reached
+                             if reached else 0),
+                    "histogram": histogram,
+                }
+        return results
+    finally:
+        block.close()
+        block.unlink()
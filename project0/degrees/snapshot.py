@@ -0,0 +1,275 @@
+import json
+import mmap
+import os
+import struct
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Mapping, Sequence
+
+from graph import CompactGraph
+
+# Bump whenever the layout below changes so old snapshots are rebuilt
+SNAPSHOT_VERSION = 1
+SNAPSHOT_NAME = "degrees.snapshot"
+SOURCES = ("people.csv", "movies.csv", "stars.csv")
+
+MAGIC = b"DEGSNAP\0"
+HEADER = struct.Struct("<8sI")
+ALIGNMENT = 8
+
+
+class Snapshot():
+    """
+    Memory-mapped copy of a loaded dataset.
+
+    `names`, `people` and `movies` are read-only mappings shaped like the
+    dictionaries filled in by `degrees.load_data`, decoded on access, and
+    `graph` is a CompactGraph whose arrays point straight into the file.
+    """
+
+    def __init__(self, buffer, start, sections):
+        self.buffer = buffer
+
+        def section(name):
+            typecode, offset, length = sections[name]
+            offset += start
+            view = memoryview(buffer)[offset:offset + length]
+            return view if typecode == "B" else view.cast(typecode)
+
+        def strings(name):
+            return StringTable(section(f"{name}.offsets"), section(name))
+
+        self.graph = CompactGraph(
+            strings("person_ids"), strings("movie_ids"),
+            section("person_offsets"), section("person_movies"),
+            section("movie_offsets"), section("movie_people")
+        )
+        self.people = PeopleView(
+            self.graph, strings("person_names"), strings("person_births")
+        )
+        self.movies = MoviesView(
+            self.graph, strings("movie_titles"), strings("movie_years")
+        )
+        self.names = NamesView(
+            self.graph, strings("name_keys"), section("name_people")
+        )
+
+
+class StringTable(Sequence):
+    """
+    Sequence of strings stored as one UTF-8 blob plus end offsets.
+    """
+
+    def __init__(self, offsets, blob):
+        self.offsets = offsets
+        self.blob = blob
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("string table index out of range")
+        return str(self.blob[self.offsets[i]:self.offsets[i + 1]], "utf-8")
+
+    @staticmethod
+    def encode(strings):
+        """
+        Returns the (offsets, blob) pair for a list of strings.
+        """
+        offsets = array("i", [0])
+        blob = bytearray()
+        for string in strings:
+            blob += string.encode("utf-8")
+            offsets.append(len(blob))
+        return offsets, blob
+
+
+class PeopleView(Mapping):
+
+    def __init__(self, graph, names, births):
+        self.graph = graph
+        self.names = names
+        self.births = births
+
+    def __getitem__(self, person_id):
+        p = self.graph.person_index(person_id)
+        if p is None:
+            raise KeyError(person_id)
+        graph = self.graph
+        start, end = graph.person_offsets[p], graph.person_offsets[p + 1]
+        return {
+            "name": self.names[p],
+            "birth": self.births[p],
+            "movies": {graph.movie_ids[m] for m in graph.person_movies[start:end]}
+        }
+
+    def __iter__(self):
+        return iter(self.graph.person_ids)
+
+    def __len__(self):
+        return len(self.graph.person_ids)
+
+
+class MoviesView(Mapping):
+
+    def __init__(self, graph, titles, years):
+        self.graph = graph
+        self.titles = titles
+        self.years = years
+
+    def __getitem__(self, movie_id):
+        m = self.graph.movie_index(movie_id)
+        if m is None:
+            raise KeyError(movie_id)
+        graph = self.graph
+        start, end = graph.movie_offsets[m], graph.movie_offsets[m + 1]
+        return {
+            "title": self.titles[m],
+            "year": self.years[m],
+            "stars": {graph.person_ids[p] for p in graph.movie_people[start:end]}
+        }
+
+    def __iter__(self):
+        return iter(self.graph.movie_ids)
+
+    def __len__(self):
+        return len(self.graph.movie_ids)
+
+
+class NamesView(Mapping):
+    """
+    Maps lowercase names to sets of person_ids using a sorted name index.
+    """
+
+    def __init__(self, graph, sorted_names, name_people):
+        self.graph = graph
+        self.sorted_names = sorted_names
+        self.name_people = name_people
+
+    def __getitem__(self, name):
+        start = bisect_left(self.sorted_names, name)
+        end = bisect_right(self.sorted_names, name, start)
+        if start == end:
+            raise KeyError(name)
+        person_ids = self.graph.person_ids
+        return {person_ids[self.name_people[i]] for i in range(start, end)}
+
+    def __iter__(self):
+        previous = None
+        for key in self.sorted_names:
+            if key != previous:
+                yield key
+                previous = key
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+
+def snapshot_path(directory):
+    return os.path.join(directory, SNAPSHOT_NAME)
+
+
+def data_start(header_length):
+    """
+    Returns the aligned file offset at which the sections begin.
+    """
+    return -(-(HEADER.size + header_length) // ALIGNMENT) * ALIGNMENT
+
+
+def source_signature(directory):
+    """
+    Returns the sizes and modification times of the dataset's CSV files.
+    """
+    signature = {}
+    for filename in SOURCES:
+        stat = os.stat(os.path.join(directory, filename))
+        signature[filename] = [stat.st_size, stat.st_mtime_ns]
+    return signature
+
+
+def load_snapshot(directory):
+    """
+    Returns the Snapshot stored next to the CSV files in `directory`,
+    or None if there is none or it is out of date.
+    """
+    try:
+        with open(snapshot_path(directory), "rb") as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+    try:
+        magic, header_length = HEADER.unpack_from(buffer)
+        if magic != MAGIC:
+            return None
+        header = json.loads(buffer[HEADER.size:HEADER.size + header_length])
+        if (header["version"] != SNAPSHOT_VERSION
+                or header["source"] != source_signature(directory)):
+            return None
+        return Snapshot(buffer, data_start(header_length), header["sections"])
+    except (struct.error, ValueError, KeyError, TypeError, OSError):
+        return None
+
+
+def write_snapshot(directory, people, movies, graph):
+    """
+    Writes a snapshot of the loaded data next to the CSV files.
+    """
+    person_ids = graph.person_ids
+    movie_ids = graph.movie_ids
+    name_index = sorted(
+        (people[person_id]["name"].lower(), p)
+        for p, person_id in enumerate(person_ids)
+    )
+
+    sections = {}
+    for name, strings in [
+        ("person_ids", person_ids),
+        ("person_names", [people[person_id]["name"] for person_id in person_ids]),
+        ("person_births", [people[person_id]["birth"] for person_id in person_ids]),
+        ("movie_ids", movie_ids),
+        ("movie_titles", [movies[movie_id]["title"] for movie_id in movie_ids]),
+        ("movie_years", [movies[movie_id]["year"] for movie_id in movie_ids]),
+        ("name_keys", [key for key, _ in name_index]),
+    ]:
+        offsets, blob = StringTable.encode(strings)
+        sections[f"{name}.offsets"] = offsets
+        sections[name] = blob
+    sections["name_people"] = array("i", (p for _, p in name_index))
+    sections["person_offsets"] = graph.person_offsets
+    sections["person_movies"] = graph.person_movies
+    sections["movie_offsets"] = graph.movie_offsets
+    sections["movie_people"] = graph.movie_people
+
+    # Lay the sections out one after another, each aligned for casting
+    layout = {}
+    offset = 0
+    for name, data in sections.items():
+        typecode = data.typecode if isinstance(data, array) else "B"
+        length = len(data) * (data.itemsize if isinstance(data, array) else 1)
+        layout[name] = [typecode, offset, length]
+        offset += -(-length // ALIGNMENT) * ALIGNMENT
+
+    header = {
+        "version": SNAPSHOT_VERSION,
+        "source": source_signature(directory),
+        "sections": layout,
+    }
+
+    encoded = json.dumps(header).encode("utf-8")
+    start = data_start(len(encoded))
+
+    path = snapshot_path(directory)
+    temporary = f"{path}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(HEADER.pack(MAGIC, len(encoded)))
+        f.write(encoded)
+        f.seek(start + offset)
+        f.truncate()
+        for name, data in sections.items():
+            f.seek(start + layout[name][1])
+            f.write(data)
+    os.replace(temporary, path)
@@ -0,0 +1,113 @@
+"""
+Tic Tac Toe engine benchmark
+
+Replays a fixed suite of positions through every search in
+tictactoe.SEARCHES, starting each position from empty tables, and
+reports the nodes visited, cache hits, cutoffs and time per move.
+
+Usage: python benchmark.py [repeats]
+"""
+
+import sys
+
+import bitboard
+import tictactoe as ttt
+
+X = ttt.X
+O = ttt.O
+E = ttt.EMPTY
+
+# Positions where one move matters: wins to take, threats to block,
+# forks to make or stop
+TACTICS = {
+    "win in one": [[X, X, E],
+                   [O, O, E],
+                   [E, E, E]],
+    "block": [[X, E, E],
+              [O, O, E],
+              [X, E, E]],
+    "make fork": [[X, O, E],
+                  [E, E, E],
+                  [E, E, E]],
+    "stop fork": [[X, E, E],
+                  [E, O, E],
+                  [E, E, X]],
+    "block diagonal": [[X, X, O],
+                       [E, O, E],
+                       [E, E, E]],
+}
+
+
+def suite():
+    """
+    Returns the (name, board) positions to benchmark: the empty board,
+    every first move and the tactical positions.
+    """
+    positions = [("empty", ttt.initial_state())]
+    for i, j in sorted(ttt.actions(ttt.initial_state())):
+        positions.append((f"X at {i},{j}", ttt.result(ttt.initial_state(), (i, j))))
+    positions.extend(TACTICS.items())
+    return positions
+
+
+def optimal(board, action):
+    """
+    Returns True if `action` keeps the value of the position.
+    """
+    x, o = bitboard.encode(board)
+    child = bitboard.encode(ttt.result(board, action))
+    return bitboard.value(*child) == bitboard.value(x, o)
+
+
+def run(search, board):
+    """
+    Returns the action `search` picks on the board from empty tables, with
+    the statistics of that one move.
+    """
+    ttt.clear_table()
+    bitboard.table.clear()
+    ttt.reset_stats()
+    action = ttt.minimax(board, search)
+    return action, ttt.search_stats()
+
+
+def main():
+    if len(sys.argv) > 2:
+        sys.exit("Usage: python benchmark.py [repeats]")
+    repeats = int(sys.argv[1]) if len(sys.argv) == 2 else 1
+
+    # Benchmark the searches, not the book
+    ttt.book = None
+
+    print(f"{'search':<10} {'position':<16} {'move':<7} {'nodes':>8} "
+          f"{'hits':>8} {'cutoffs':>8} {'ms':>9}")
+    totals = {}
+    for search in ttt.SEARCHES:
+        total = totals[search] = {"nodes": 0, "cache_hits": 0, "cutoffs": 0,
+                                  "seconds": 0, "wrong": 0}
+        for name, board in suite():
+            best = None
+            for _ in range(repeats):
+                action, stats = run(search, board)
+                if best is None or stats["seconds"] < best["seconds"]:
+                    best = stats
+            if not optimal(board, action):
+                total["wrong"] += 1
+            for key in total:
+                if key != "wrong":
+                    total[key] += best[key]
+            print(f"{search:<10} {name:<16} {str(action):<7} "
+                  f"{best['nodes']:>8} {best['cache_hits']:>8} "
+                  f"{best['cutoffs']:>8} {best['seconds'] * 1000:>9.2f}")
+
+    print()
+    print(f"{'search':<10} {'nodes':>10} {'hits':>10} {'cutoffs':>10} "
+          f"{'ms':>10} {'wrong':>6}")
+    for search, total in totals.items():
+        print(f"{search:<10} {total['nodes']:>10} {total['cache_hits']:>10} "
+              f"{total['cutoffs']:>10} {total['seconds'] * 1000:>10.2f} "
+              f"{total['wrong']:>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""
+Tic Tac Toe bitboard engine
+"""
+
+from collections import Counter
+
+X = "X"
+O = "O"
+EMPTY = None
+
+# Cell (i, j) is bit 3 * i + j of a player's 9-bit board
+FULL = 0b111111111
+
+# Rows, columns and diagonals
+WIN_MASKS = (
+    0b000000111, 0b000111000, 0b111000000,
+    0b001001001, 0b010010010, 0b100100100,
+    0b100010001, 0b001010100,
+)
+
+# Cells to try first: center, corners, edges
+MOVE_ORDER = (4, 0, 2, 6, 8, 1, 3, 5, 7)
+
+# The 8 rotations and reflections of the board, as maps of (i, j)
+SYMMETRIES = (
+    lambda i, j: (i, j),
+    lambda i, j: (j, 2 - i),
+    lambda i, j: (2 - i, 2 - j),
+    lambda i, j: (2 - j, i),
+    lambda i, j: (i, 2 - j),
+    lambda i, j: (2 - i, j),
+    lambda i, j: (j, i),
+    lambda i, j: (2 - j, 2 - i),
+)
+
+
+def permutation_table(symmetry):
+    """
+    Returns a list mapping every 9-bit board to its image under symmetry.
+    """
+    targets = []
+    for cell in range(9):
+        i, j = symmetry(cell // 3, cell % 3)
+        targets.append(3 * i + j)
+    table = []
+    for bits in range(FULL + 1):
+        image = 0
+        for cell in range(9):
+            if bits >> cell & 1:
+                image |= 1 << targets[cell]
+        table.append(image)
+    return table
+
+
+PERMUTATIONS = [permutation_table(symmetry) for symmetry in SYMMETRIES]
+
+# Minimax values of positions already searched, keyed by canonical(x, o)
+table = {}
+
+# Nodes visited, table hits and cutoffs, as in tictactoe.stats
+stats = Counter()
+
+
+def encode(board):
+    """
+    Returns the (x, o) bitboards of a list-of-lists board.
+    """
+    x = o = 0
+    for i, row in enumerate(board):
+        for j, cell in enumerate(row):
+            if cell == X:
+                x |= 1 << (3 * i + j)
+            elif cell == O:
+                o |= 1 << (3 * i + j)
+    return x, o
+
+
+def decode(x, o):
+    """
+    Returns the list-of-lists board of (x, o) bitboards.
+    """
+    return [[X if x >> (3 * i + j) & 1 else O if o >> (3 * i + j) & 1 else EMPTY
+             for j in range(3)]
+            for i in range(3)]
+
+
+def has_won(bits):
+    """
+    Returns True if a player's bitboard holds a complete line.
+    """
+    for mask in WIN_MASKS:
+        if bits & mask == mask:
+            return True
+    return False
+
+
+def canonical(x, o):
+    """
+    Returns one key shared by a position and all its symmetric images.
+    """
+    return min((p[x] << 9) | p[o] for p in PERMUTATIONS)
+
+
+def x_to_move(x, o):
+    return bin(x).count("1") == bin(o).count("1")
+
+
+def value(x, o):
+    """
+    Returns 1 if X wins with perfect play from the position, -1 if O
+    wins, 0 for a draw.
+    """
+    stats["nodes"] += 1
+    key = canonical(x, o)
+    if key in table:
+        stats["cache_hits"] += 1
+        return table[key]
+    if has_won(x):
+        v = 1
+    elif has_won(o):
+        v = -1
+    elif x | o == FULL:
+        v = 0
+    elif x_to_move(x, o):
+        v = -1
+        for cell in MOVE_ORDER:
+            bit = 1 << cell
+            if not (x | o) & bit:
+                v = max(v, value(x | bit, o))
+                if v == 1:
+                    stats["cutoffs"] += 1
+                    break
+    else:
+        v = 1
+        for cell in MOVE_ORDER:
+            bit = 1 << cell
+            if not (x | o) & bit:
+                v = min(v, value(x, o | bit))
+                if v == -1:
+                    stats["cutoffs"] += 1
+                    break
+    table[key] = v
+    return v
+
+
+def best_move(x, o):
+    """
+    Returns the cell of the optimal move for the player to move, or None
+    if the game is over.
+    """
+    if has_won(x) or has_won(o) or x | o == FULL:
+        return None
+    maximizing = x_to_move(x, o)
+    best = None
+    best_value = None
+    for cell in MOVE_ORDER:
+        bit = 1 << cell
+        if (x | o) & bit:
+            continue
+        v = value(x | bit, o) if maximizing else value(x, o | bit)
+        if best is None or (v > best_value if maximizing else v < best_value):
+            best, best_value = cell, v
+            if best_value == (1 if maximizing else -1):
+                stats["cutoffs"] += 1
+                break
+    return best
+
+
+def winner(board):
+    """
+    Returns the winner of a list-of-lists board, if there is one.
+    """
+    x, o = encode(board)
+    if has_won(x):
+        return X
+    elif has_won(o):
+        return O
+    return None
+
+
+def minimax(board):
+    """
+    Returns the optimal action (i, j) on a list-of-lists board.
+    """
+    cell = best_move(*encode(board))
+    return None if cell is None else divmod(cell, 3)
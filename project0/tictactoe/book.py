@@ -0,0 +1,59 @@
+"""
+Tic Tac Toe opening book generator
+
+Enumerates every board reachable in a game and writes its perfect-play
+move and value to a table that tictactoe.load_book reads.
+
+Usage: python book.py [output]
+"""
+
+import sys
+
+import bitboard
+import tictactoe as ttt
+
+
+def reachable_boards():
+    """
+    Returns every board reachable from the initial state, keyed by its
+    position in the book.
+    """
+    boards = {}
+    frontier = [ttt.initial_state()]
+    while frontier:
+        board = frontier.pop()
+        index = ttt.book_index(board)
+        if index in boards:
+            continue
+        boards[index] = board
+        if not ttt.terminal(board):
+            for action in ttt.actions(board):
+                frontier.append(ttt.result(board, action))
+    return boards
+
+
+def generate():
+    """
+    Returns the book as bytes, one entry per possible board.
+    """
+    table = bytearray([ttt.UNREACHABLE]) * 3 ** 9
+    for index, board in reachable_boards().items():
+        x, o = bitboard.encode(board)
+        value = bitboard.value(x, o)
+        action = None if ttt.terminal(board) else ttt.minimax(board)
+        cell = ttt.NO_MOVE if action is None else 3 * action[0] + action[1]
+        table[index] = (value + 1) << 4 | cell
+    return bytes(table)
+
+
+def main():
+    if len(sys.argv) > 2:
+        sys.exit("Usage: python book.py [output]")
+    path = sys.argv[1] if len(sys.argv) == 2 else ttt.BOOK_FILE
+    with open(path, "wb") as f:
+        f.write(generate())
+    print(f"Wrote {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+"""
+m,n,k game player: k in a row on an m by n board
+"""
+
+import time
+
+X = "X"
+O = "O"
+EMPTY = None
+
+# Seconds the AI may spend choosing a move
+TIME_BUDGET = 1.0
+
+# Directions a line can run in from a cell
+DIRECTIONS = ((0, 1), (1, 0), (1, 1), (1, -1))
+
+
+class Timeout(Exception):
+    pass
+
+
+class MNKGame():
+    """
+    An m by n board where the first player to get k in a row wins.
+
+    Offers the same functions as the tictactoe module, so runner.py can
+    play it, with minimax replaced by a depth-limited search that
+    deepens iteratively until `time_budget` seconds have passed.
+    """
+
+    X = X
+    O = O
+    EMPTY = EMPTY
+
+    def __init__(self, m, n, k, time_budget=TIME_BUDGET):
+        if k > max(m, n):
+            raise ValueError("k must fit on the board")
+        self.m = m
+        self.n = n
+        self.k = k
+        self.time_budget = time_budget
+
+        # Every run of k cells that could make a line
+        self.windows = []
+        for i in range(m):
+            for j in range(n):
+                for di, dj in DIRECTIONS:
+                    end_i, end_j = i + (k - 1) * di, j + (k - 1) * dj
+                    if 0 <= end_i < m and 0 <= end_j < n:
+                        self.windows.append(
+                            [(i + s * di, j + s * dj) for s in range(k)]
+                        )
+
+        # Score of a won position: above any heuristic evaluation even
+        # after taking off the plies it took to win
+        self.win = len(self.windows) * 10 ** k + m * n + 1
+
+    def initial_state(self):
+        """
+        Returns starting state of the board.
+        """
+        return [[EMPTY] * self.n for _ in range(self.m)]
+
+    def player(self, board):
+        """
+        Returns player who has the next turn on a board.
+        """
+        count_x = sum(row.count(X) for row in board)
+        count_o = sum(row.count(O) for row in board)
+        return O if count_x > count_o else X
+
+    def actions(self, board):
+        """
+        Returns set of all possible actions (i, j) available on the board.
+        """
+        return {(i, j) for i in range(self.m) for j in range(self.n)
+                if board[i][j] == EMPTY}
+
+    def result(self, board, action):
+        """
+        Returns the board that results from making move (i, j) on the board.
+        """
+        i, j = action
+        if not (0 <= i < self.m and 0 <= j < self.n) or board[i][j] != EMPTY:
+            raise Exception("Invalid action")
+        new_board = [row[:] for row in board]
+        new_board[i][j] = self.player(board)
+        return new_board
+
+    def winner(self, board):
+        """
+        Returns the winner of the game, if there is one.
+        """
+        for window in self.windows:
+            first = board[window[0][0]][window[0][1]]
+            if first != EMPTY and all(board[i][j] == first for i, j in window):
+                return first
+        return None
+
+    def terminal(self, board):
+        """
+        Returns True if game is over, False otherwise.
+        """
+        return (self.winner(board) is not None
+                or all(cell != EMPTY for row in board for cell in row))
+
+    def utility(self, board):
+        """
+        Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+        """
+        winner = self.winner(board)
+        return 1 if winner == X else -1 if winner == O else 0
+
+    def wins_at(self, board, i, j):
+        """
+        Returns True if the stone at (i, j) completes k in a row, checking
+        only the lines through that cell.
+        """
+        mark = board[i][j]
+        for di, dj in DIRECTIONS:
+            count = 1
+            for sign in (1, -1):
+                r, c = i + sign * di, j + sign * dj
+                while 0 <= r < self.m and 0 <= c < self.n and board[r][c] == mark:
+                    count += 1
+                    r, c = r + sign * di, c + sign * dj
+            if count >= self.k:
+                return True
+        return False
+
+    def evaluate(self, board, mark):
+        """
+        Returns a heuristic score of the board for `mark`: every window
+        holding only one player's stones counts for that player, more
+        steeply the more stones it holds.
+        """
+        other = O if mark == X else X
+        score = 0
+        for window in self.windows:
+            mine = theirs = 0
+            for i, j in window:
+                cell = board[i][j]
+                if cell == mark:
+                    mine += 1
+                elif cell == other:
+                    theirs += 1
+            if mine and not theirs:
+                score += 10 ** mine
+            elif theirs and not mine:
+                score -= 10 ** theirs
+        return score
+
+    def candidates(self, board):
+        """
+        Returns the empty cells next to a stone (the center on an empty
+        board), which are the only moves worth searching.
+        """
+        moves = []
+        stones = False
+        for i in range(self.m):
+            for j in range(self.n):
+                if board[i][j] != EMPTY:
+                    stones = True
+                    continue
+                if any(board[r][c] != EMPTY
+                       for r in range(max(i - 1, 0), min(i + 2, self.m))
+                       for c in range(max(j - 1, 0), min(j + 2, self.n))):
+                    moves.append((i, j))
+        if not stones:
+            return [(self.m // 2, self.n // 2)]
+        return moves
+
+    def minimax(self, board):
+        """
+        Returns the best action found for the current player on the board
+        within the time budget.
+        """
+        if self.terminal(board):
+            return None
+        board = [row[:] for row in board]
+        mark = self.player(board)
+        moves = self.candidates(board)
+        best = moves[0]
+        if len(moves) == 1:
+            return best
+        deadline = time.monotonic() + self.time_budget
+        empty = sum(row.count(EMPTY) for row in board)
+
+        # Search one ply deeper each time, keeping the last finished answer
+        for depth in range(1, empty + 1):
+            try:
+                score, move = self.search(
+                    board, mark, depth, -self.win - 1, self.win + 1, deadline, best
+                )
+            except Timeout:
+                break
+            best = move
+            if abs(score) >= self.win - self.m * self.n:
+                break
+        return best
+
+    def search(self, board, mark, depth, alpha, beta, deadline, first=None):
+        """
+        Negamax alpha-beta search for `mark` to `depth` plies. Returns the
+        score and best move, trying `first` before the other moves.
+        """
+        if time.monotonic() > deadline:
+            raise Timeout
+        other = O if mark == X else X
+        moves = self.candidates(board)
+        if first in moves:
+            moves.remove(first)
+            moves.insert(0, first)
+
+        best_score = -self.win - 1
+        best_move = moves[0] if moves else None
+        for i, j in moves:
+            board[i][j] = mark
+            if self.wins_at(board, i, j):
+                # Prefer quicker wins
+                score = self.win + depth
+            elif depth == 1 or all(cell != EMPTY for row in board for cell in row):
+                score = self.evaluate(board, mark)
+            else:
+                score, _ = self.search(
+                    board, other, depth - 1, -beta, -alpha, deadline
+                )
+                score = -score
+            board[i][j] = EMPTY
+
+            if score > best_score:
+                best_score, best_move = score, (i, j)
+            alpha = max(alpha, score)
+            if alpha >= beta:
+                break
+        return best_score, best_move
@@ -4,11 +4,40 @@ Tic Tac Toe Player
 
 import math
 import copy
+import json
+import time
+from collections import Counter
+
+import bitboard
 
 X = "X"
 O = "O"
 EMPTY = None
 
+# Search algorithms minimax can use
+SEARCHES = ("bitboard", "memo", "alphabeta", "state")
+
+# Order in which alpha-beta search tries moves: center, corners, edges
+MOVE_ORDER = [(1, 1),
+              (0, 0), (0, 2), (2, 0), (2, 2),
+              (0, 1), (1, 0), (1, 2), (2, 1)]
+
+# Minimax values of boards already searched, keyed by encode(board).
+# Kept between moves and games; see save_table and load_table.
+table = {}
+
+# Work done by the searches since reset_stats: nodes visited, cache hits,
+# alpha-beta cutoffs, moves chosen and seconds spent choosing them
+stats = Counter()
+
+# Perfect-play table written by book.py, if load_book has read one
+book = None
+BOOK_FILE = "book.bin"
+
+# Book entry of boards that cannot be reached in a game
+UNREACHABLE = 0xFF
+NO_MOVE = 0x0F
+
 
 def initial_state():
     """
@@ -61,54 +90,11 @@ def result(board, action):
     return new_board
 
     
-def check_rows(board, player):
-    for row in range(len(board)):
-        if board[row][0] == board[row][1] == board[row][2] == player:
-            return True
-    return False
-
-        
-def check_columns(board, player):
-    for column in range(len(board)):
-        if board[0][column] == board[1][column] == board[2][column] == player:
-            return True
-    return False
-
-
-def check_first_diagonal(board, player):
-    count = 0
-    for row in range(len(board)):
-        for col in range(len(board[row])):
-            if row == col and board[row][col] == player:
-                count += 1
-    if count == 3:
-        return True
-    else:
-        return False
-    
-    
-def check_second_diagonal(board, player):
-    count = 0
-    for row in range(len(board)):
-        for col in range(len(board[row])):
-            if len(board) - 1 - row == col and board[row][col] == player:
-                count += 1
-    if count == 3:
-        return True
-    else:
-        return False
-    
-
 def winner(board):
     """
     Returns the winner of the game, if there is one.
     """
-    if check_rows(board, X) or check_columns(board, X) or check_first_diagonal(board, X) or check_second_diagonal(board, X):
-        return X
-    elif check_rows(board, O) or check_columns(board, O) or check_first_diagonal(board, O) or check_second_diagonal(board, O):
-        return O
-    else:
-        return None
+    return bitboard.winner(board)
 
 
 def terminal(board):
@@ -132,30 +118,335 @@ def utility(board):
         return 0
     
     
+def encode(board):
+    """
+    Returns a string key for the board, one character per cell.
+    """
+    return "".join(cell or "-" for row in board for cell in row)
+
+
 def max_value(board):
+    stats["nodes"] += 1
+    key = encode(board)
+    if key in table:
+        stats["cache_hits"] += 1
+        return table[key]
     v = -math.inf
     if terminal(board):
-        return utility(board)
-    for action in actions(board):
-        v = max(v, min_value(result(board, action)))
+        v = utility(board)
+    else:
+        for action in actions(board):
+            v = max(v, min_value(result(board, action)))
+    table[key] = v
     return v
 
 
 def min_value(board):
+    stats["nodes"] += 1
+    key = encode(board)
+    if key in table:
+        stats["cache_hits"] += 1
+        return table[key]
     v = math.inf
+    if terminal(board):
+        v = utility(board)
+    else:
+        for action in actions(board):
+            v = min(v, max_value(result(board, action)))
+    table[key] = v
+    return v
+
+
+def save_table(path):
+    """
+    Writes the table of searched boards to a JSON file.
+    """
+    with open(path, "w") as f:
+        json.dump(table, f)
+
+
+def load_table(path):
+    """
+    Adds the boards in a JSON file written by save_table to the table.
+    """
+    with open(path) as f:
+        table.update(json.load(f))
+
+
+def clear_table():
+    """
+    Forgets every searched board.
+    """
+    table.clear()
+
+
+def reset_stats():
+    """
+    Zeroes the search statistics of every engine.
+    """
+    stats.clear()
+    bitboard.stats.clear()
+
+
+def search_stats():
+    """
+    Returns the search statistics of every engine since reset_stats.
+    """
+    return stats + bitboard.stats
+
+
+def book_index(board):
+    """
+    Returns the board's position in the book: its cells read row by row
+    as the digits of a base 3 number, with EMPTY 0, X 1 and O 2.
+    """
+    index = 0
+    for row in reversed(board):
+        for cell in reversed(row):
+            index = 3 * index + (0 if cell == EMPTY else 1 if cell == X else 2)
+    return index
+
+
+def load_book(path=BOOK_FILE):
+    """
+    Reads the perfect-play table written by book.py, which minimax then
+    consults before searching. Each byte holds a board's best cell
+    (3 * i + j, or NO_MOVE if the game is over) in its low four bits and
+    its value plus 1 in the next two.
+    """
+    global book
+    with open(path, "rb") as f:
+        data = f.read()
+    if len(data) != 3 ** 9:
+        raise ValueError(f"{path} is not a tic-tac-toe book")
+    book = data
+
+
+def book_lookup(board):
+    """
+    Returns the (action, value) the book holds for the board, or None if
+    no book is loaded or the board cannot be reached in a game.
+    """
+    if book is None:
+        return None
+    entry = book[book_index(board)]
+    if entry == UNREACHABLE:
+        return None
+    cell = entry & 0x0F
+    action = None if cell == NO_MOVE else divmod(cell, 3)
+    return action, (entry >> 4) - 1
+
+
+def ordered_actions(board):
+    """
+    Returns the possible actions on the board in MOVE_ORDER.
+    """
+    return [(i, j) for i, j in MOVE_ORDER if board[i][j] == EMPTY]
+
+
+def alphabeta_max_value(board, alpha, beta):
+    stats["nodes"] += 1
+    if terminal(board):
+        return utility(board)
+    v = -math.inf
+    for action in ordered_actions(board):
+        v = max(v, alphabeta_min_value(result(board, action), alpha, beta))
+        if v >= beta:
+            stats["cutoffs"] += 1
+            return v
+        alpha = max(alpha, v)
+    return v
+
+
+def alphabeta_min_value(board, alpha, beta):
+    stats["nodes"] += 1
     if terminal(board):
         return utility(board)
-    for action in actions(board):
-        v = min(v, max_value(result(board, action)))
+    v = math.inf
+    for action in ordered_actions(board):
+        v = min(v, alphabeta_max_value(result(board, action), alpha, beta))
+        if v <= alpha:
+            stats["cutoffs"] += 1
+            return v
+        beta = min(beta, v)
+    return v
+
+
+def alphabeta(board):
+    """
+    Returns the optimal action for the current player on the board,
+    using alpha-beta pruning. Utilities lie between -1 and 1, so that is
+    the starting window, and a forced win cuts off the remaining moves.
+    """
+    alpha, beta = -1, 1
+    best = None
+    if player(board) == X:
+        for action in ordered_actions(board):
+            v = alphabeta_min_value(result(board, action), alpha, beta)
+            if best is None or v > alpha:
+                best = action
+                alpha = max(alpha, v)
+            if alpha >= beta:
+                break
+    else:
+        for action in ordered_actions(board):
+            v = alphabeta_max_value(result(board, action), alpha, beta)
+            if best is None or v < beta:
+                best = action
+                beta = min(beta, v)
+            if alpha >= beta:
+                break
+    return best
+
+
+class GameState():
+    """
+    A game in progress, changed in place by make and undone by unmake.
+
+    Keeps the move count, side to move, set of empty cells and winner up
+    to date on every move, so nothing has to rescan or copy the board.
+    """
+
+    def __init__(self, board=None):
+        self.board = [row[:] for row in board or initial_state()]
+        self.empty = actions(self.board)
+        self.moves = 9 - len(self.empty)
+        self.to_move = player(self.board)
+        self.winner = winner(self.board)
+        self.history = []
+
+    def terminal(self):
+        return self.winner is not None or not self.empty
+
+    def utility(self):
+        return 1 if self.winner == X else -1 if self.winner == O else 0
+
+    def make(self, action):
+        """
+        Plays `action` for the side to move.
+        """
+        i, j = action
+        mark = self.to_move
+        self.board[i][j] = mark
+        self.empty.remove(action)
+        self.moves += 1
+        self.to_move = O if mark == X else X
+        self.history.append((action, self.winner))
+        if self.winner is None and self.completes_line(i, j, mark):
+            self.winner = mark
+
+    def unmake(self):
+        """
+        Takes back the last move made.
+        """
+        (i, j), self.winner = self.history.pop()
+        self.board[i][j] = EMPTY
+        self.empty.add((i, j))
+        self.moves -= 1
+        self.to_move = O if self.to_move == X else X
+
+    def completes_line(self, i, j, mark):
+        """
+        Returns True if `mark` at (i, j) completes a line through that cell.
+        """
+        board = self.board
+        return (board[i][0] == board[i][1] == board[i][2] == mark
+                or board[0][j] == board[1][j] == board[2][j] == mark
+                or i == j and board[0][0] == board[1][1] == board[2][2] == mark
+                or i + j == 2 and board[0][2] == board[1][1] == board[2][0] == mark)
+
+
+def state_value(state, alpha, beta):
+    """
+    Returns the alpha-beta value of `state` for X, making and unmaking
+    moves on it instead of copying boards.
+    """
+    stats["nodes"] += 1
+    if state.terminal():
+        return state.utility()
+    maximizing = state.to_move == X
+    v = -math.inf if maximizing else math.inf
+    for action in MOVE_ORDER:
+        if action not in state.empty:
+            continue
+        state.make(action)
+        child = state_value(state, alpha, beta)
+        state.unmake()
+        if maximizing:
+            v = max(v, child)
+            if v >= beta:
+                stats["cutoffs"] += 1
+                return v
+            alpha = max(alpha, v)
+        else:
+            v = min(v, child)
+            if v <= alpha:
+                stats["cutoffs"] += 1
+                return v
+            beta = min(beta, v)
     return v
 
 
-def minimax(board):
+def state_search(board):
+    """
+    Returns the optimal action for the current player on the board,
+    searching a single GameState with alpha-beta pruning.
+    """
+    state = GameState(board)
+    maximizing = state.to_move == X
+    alpha, beta = -1, 1
+    best = None
+    for action in MOVE_ORDER:
+        if action not in state.empty:
+            continue
+        state.make(action)
+        v = state_value(state, alpha, beta)
+        state.unmake()
+        if best is None or (v > alpha if maximizing else v < beta):
+            best = action
+            if maximizing:
+                alpha = max(alpha, v)
+            else:
+                beta = min(beta, v)
+        if alpha >= beta:
+            break
+    return best
+
+
+def minimax(board, search="bitboard"):
     """
     Returns the optimal action for the current player on the board.
+
+    `search` is one of SEARCHES: "bitboard" for the bitboard engine with
+    symmetric positions sharing one table entry, "memo" for full minimax
+    over the table of searched boards, "alphabeta" for alpha-beta pruning
+    and "state" for alpha-beta pruning with make and unmake on a GameState.
+    If a book is loaded, its move is used instead of searching.
+    """
+    if search not in SEARCHES:
+        raise ValueError(f"unknown search {search}")
+    start = time.perf_counter()
+    action = choose(board, search)
+    stats["moves"] += 1
+    stats["seconds"] += time.perf_counter() - start
+    return action
+
+
+def choose(board, search):
+    """
+    Returns the action picked by `search` on the board, or by the book.
     """
+    entry = book_lookup(board)
+    if entry is not None:
+        return entry[0]
     if terminal(board):
         return None
+    elif search == "bitboard":
+        return bitboard.minimax(board)
+    elif search == "alphabeta":
+        return alphabeta(board)
+    elif search == "state":
+        return state_search(board)
     elif player(board) == X:
         plays = []
         for action in actions(board):
@@ -0,0 +1,101 @@
+"""
+Knights solver benchmark
+
+Generates random knights and knaves puzzles with a growing number of
+inhabitants and asks every entailment backend which inhabitants are
+knights and which are knaves, reporting the time, peak memory and work
+each one needs and checking that they all agree with the solution.
+
+Usage: python benchmark.py [sizes ...] [--puzzles P] [--depth D]
+"""
+
+import argparse
+import time
+import tracemalloc
+
+from generator import generate
+from logic import model_check_all
+from parallel import parallel_model_check_all
+from sat import sat_check_all
+
+# Backends with the most symbols each is run on, or None for no limit
+BACKENDS = {
+    "model_check": (model_check_all, 20),
+    "parallel": (parallel_model_check_all, 20),
+    "sat": (sat_check_all, None),
+}
+
+try:
+    from truthtable import truth_table_check_all
+    BACKENDS["truthtable"] = (truth_table_check_all, 26)
+except ImportError:
+    pass
+
+SIZES = [2, 3, 4, 6, 8, 10, 13, 20, 50]
+
+
+def measure(check, knowledge, queries):
+    """
+    Returns the answers of `check` with its stats, the seconds it took and
+    its peak traced memory in bytes, from a timed run and a separate run
+    under tracemalloc. Memory used by worker processes is not traced.
+    """
+    stats = {}
+    start = time.perf_counter()
+    answers = check(knowledge, queries, stats=stats)
+    seconds = time.perf_counter() - start
+
+    tracemalloc.start()
+    check(knowledge, queries)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return answers, stats, seconds, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark knights solvers.")
+    parser.add_argument("sizes", nargs="*", type=int, default=SIZES,
+                        help="numbers of inhabitants to try")
+    parser.add_argument("--puzzles", type=int, default=3,
+                        help="puzzles generated per size")
+    parser.add_argument("--depth", type=int, default=2,
+                        help="nesting depth of statements")
+    parser.add_argument("--backends", nargs="+", choices=list(BACKENDS),
+                        default=list(BACKENDS), help="backends to run")
+    args = parser.parse_args()
+
+    print(f"{'n':>3} {'backend':<12} {'ms':>10} {'peak KiB':>10} "
+          f"{'visited':>10} {'decisions':>10} {'conflicts':>10} {'ok':>4}")
+    for n in args.sizes:
+        puzzles = [generate(n, args.depth, seed=seed)
+                   for seed in range(args.puzzles)]
+        for name in args.backends:
+            check, limit = BACKENDS[name]
+            if limit is not None and 2 * n > limit:
+                continue
+            seconds = peak = visited = decisions = conflicts = 0
+            correct = True
+            for puzzle in puzzles:
+                queries = puzzle.symbols()
+                answers, stats, elapsed, memory = measure(
+                    check, puzzle.knowledge(), queries
+                )
+                seconds += elapsed
+                peak = max(peak, memory)
+                visited += stats.get("visited", 0)
+                decisions += stats.get("decisions", 0)
+                conflicts += stats.get("conflicts", 0)
+
+                # Each inhabitant is entailed to be what they really are
+                expected = [value for is_knight in puzzle.truth
+                            for value in (is_knight, not is_knight)]
+                correct = correct and answers == expected
+            count = len(puzzles)
+            print(f"{n:>3} {name:<12} {seconds / count * 1000:>10.2f} "
+                  f"{peak / 1024:>10.1f} {visited // count:>10} "
+                  f"{decisions // count:>10} {conflicts // count:>10} "
+                  f"{'yes' if correct else 'NO':>4}")
+
+
+if __name__ == "__main__":
+    main()
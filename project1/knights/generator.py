@@ -0,0 +1,117 @@
+import random
+
+from logic import And, Biconditional, Implication, Not, Or, Symbol
+from sat import backbone
+
+# Statements made per inhabitant before giving up on a unique solution
+MAX_STATEMENTS = 4
+
+
+class Puzzle():
+    """
+    A knights and knaves puzzle: each inhabitant is either a knight, who
+    always tells the truth, or a knave, who always lies.
+
+    `knights` and `knaves` hold each inhabitant's "X is a Knight" and
+    "X is a Knave" symbols, `truth` whether each inhabitant really is a
+    knight, and `statements` the (speaker, statement) pairs the knowledge
+    base encodes the way puzzle.py does.
+    """
+
+    def __init__(self, names):
+        self.names = names
+        self.knights = [Symbol(f"{name} is a Knight") for name in names]
+        self.knaves = [Symbol(f"{name} is a Knave") for name in names]
+        self.truth = []
+        self.statements = []
+
+    def symbols(self):
+        """Returns the symbols the puzzle asks about."""
+        return [symbol for pair in zip(self.knights, self.knaves)
+                for symbol in pair]
+
+    def knowledge(self):
+        """Returns the knowledge base of the puzzle."""
+        facts = []
+        for knight, knave in zip(self.knights, self.knaves):
+            facts.append(Or(knight, knave))
+            facts.append(Not(And(knight, knave)))
+        for speaker, statement in self.statements:
+            facts.append(Implication(self.knights[speaker], statement))
+            facts.append(Implication(self.knaves[speaker], Not(statement)))
+        return And(*facts)
+
+    def evaluate(self, statement):
+        """Evaluates a statement in the puzzle's true world."""
+        model = {}
+        for knight, knave, is_knight in zip(self.knights, self.knaves,
+                                            self.truth):
+            model[knight.name] = is_knight
+            model[knave.name] = not is_knight
+        return statement.evaluate(model)
+
+    def __str__(self):
+        lines = []
+        for speaker, statement in self.statements:
+            lines.append(f"{self.names[speaker]} says \"{statement.formula()}\"")
+        return "\n".join(lines)
+
+
+def claim(puzzle, rng, depth):
+    """
+    Returns a random statement about the inhabitants, nesting up to
+    `depth` levels of connectives and of other inhabitants' claims.
+    """
+    n = len(puzzle.names)
+    if depth == 0 or rng.random() < 0.3:
+        i = rng.randrange(n)
+        return rng.choice((puzzle.knights, puzzle.knaves))[i]
+
+    kind = rng.randrange(6)
+    if kind == 0:
+        return Not(claim(puzzle, rng, depth - 1))
+    elif kind == 1:
+        return And(claim(puzzle, rng, depth - 1), claim(puzzle, rng, depth - 1))
+    elif kind == 2:
+        return Or(claim(puzzle, rng, depth - 1), claim(puzzle, rng, depth - 1))
+    elif kind == 3:
+        return Implication(claim(puzzle, rng, depth - 1),
+                           claim(puzzle, rng, depth - 1))
+    elif kind == 4:
+        return Biconditional(claim(puzzle, rng, depth - 1),
+                             claim(puzzle, rng, depth - 1))
+
+    # "B says S" holds exactly when B is a knight and S is true, or B is a
+    # knave and S is false
+    i = rng.randrange(n)
+    return Biconditional(puzzle.knights[i], claim(puzzle, rng, depth - 1))
+
+
+def generate(n, depth=2, seed=None, unique=True):
+    """
+    Returns a random Puzzle with `n` inhabitants who each make a statement
+    nested up to `depth` levels. Knights only make true statements and
+    knaves false ones, so the puzzle always has a solution. If `unique`,
+    inhabitants keep making statements (up to MAX_STATEMENTS each) until
+    the solution is the only one.
+    """
+    rng = random.Random(seed)
+    names = [name_of(i) for i in range(n)]
+    puzzle = Puzzle(names)
+    puzzle.truth = [rng.random() < 0.5 for _ in range(n)]
+
+    for _ in range(MAX_STATEMENTS):
+        for speaker in range(n):
+            statement = claim(puzzle, rng, depth)
+            if puzzle.evaluate(statement) != puzzle.truth[speaker]:
+                statement = Not(statement)
+            puzzle.statements.append((speaker, statement))
+        if not unique or len(backbone(puzzle.knowledge())) == 2 * n:
+            break
+    return puzzle
+
+
+def name_of(i):
+    """Returns the name of inhabitant i: A to Z, then A1 to Z1, and so on."""
+    letter = chr(ord("A") + i % 26)
+    return letter if i < 26 else f"{letter}{i // 26}"
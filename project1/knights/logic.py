@@ -1,7 +1,48 @@
 import itertools
+import weakref
 
 
 class Sentence():
+    """
+    A logical sentence. Sentences are immutable and hash-consed: building
+    a sentence identical to one that already exists returns the existing
+    object, so equal sentences are the same object and share their cached
+    hash and symbol set.
+    """
+
+    # Every live sentence, keyed by its class and the identities of its parts
+    interned = weakref.WeakValueDictionary()
+
+    @classmethod
+    def intern(cls, parts, **attributes):
+        """Returns the sentence of this class made of parts, building it
+        with attributes if there is none yet."""
+        key = (cls,) + tuple(
+            id(part) if isinstance(part, Sentence) else part for part in parts
+        )
+        sentence = Sentence.interned.get(key)
+        if sentence is None:
+            sentence = object.__new__(cls)
+            for name, value in attributes.items():
+                object.__setattr__(sentence, name, value)
+            object.__setattr__(sentence, "parts", parts)
+            object.__setattr__(sentence, "hash_value", hash(
+                (cls.__name__,) + tuple(hash(part) for part in parts)
+            ))
+            Sentence.interned[key] = sentence
+        return sentence
+
+    def __setattr__(self, name, value):
+        raise AttributeError("sentences are immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("sentences are immutable")
+
+    def __hash__(self):
+        return self.hash_value
+
+    def __reduce__(self):
+        return (type(self), self.parts)
 
     def evaluate(self, model):
         """Evaluates the logical sentence."""
@@ -11,9 +52,14 @@ class Sentence():
         """Returns string formula representing logical sentence."""
         return ""
 
+    def expression(self, index):
+        """Returns Python source evaluating the sentence over a model m
+        where symbol name is m[index[name]]."""
+        raise Exception("nothing to evaluate")
+
     def symbols(self):
         """Returns a set of all symbols in the logical sentence."""
-        return set()
+        return set(self.symbol_set)
 
     @classmethod
     def validate(cls, sentence):
@@ -44,14 +90,8 @@ class Sentence():
 
 class Symbol(Sentence):
 
-    def __init__(self, name):
-        self.name = name
-
-    def __eq__(self, other):
-        return isinstance(other, Symbol) and self.name == other.name
-
-    def __hash__(self):
-        return hash(("symbol", self.name))
+    def __new__(cls, name):
+        return cls.intern((name,), name=name, symbol_set=frozenset([name]))
 
     def __repr__(self):
         return self.name
@@ -65,20 +105,18 @@ class Symbol(Sentence):
     def formula(self):
         return self.name
 
-    def symbols(self):
-        return {self.name}
+    def expression(self, index):
+        try:
+            return f"m[{index[self.name]}]"
+        except KeyError:
+            raise Exception(f"variable {self.name} not in model")
 
 
 class Not(Sentence):
-    def __init__(self, operand):
+    def __new__(cls, operand):
         Sentence.validate(operand)
-        self.operand = operand
-
-    def __eq__(self, other):
-        return isinstance(other, Not) and self.operand == other.operand
-
-    def __hash__(self):
-        return hash(("not", hash(self.operand)))
+        return cls.intern((operand,), operand=operand,
+                          symbol_set=operand.symbol_set)
 
     def __repr__(self):
         return f"Not({self.operand})"
@@ -89,23 +127,16 @@ class Not(Sentence):
     def formula(self):
         return "¬" + Sentence.parenthesize(self.operand.formula())
 
-    def symbols(self):
-        return self.operand.symbols()
+    def expression(self, index):
+        return f"(not {self.operand.expression(index)})"
 
 
 class And(Sentence):
-    def __init__(self, *conjuncts):
+    def __new__(cls, *conjuncts):
         for conjunct in conjuncts:
             Sentence.validate(conjunct)
-        self.conjuncts = list(conjuncts)
-
-    def __eq__(self, other):
-        return isinstance(other, And) and self.conjuncts == other.conjuncts
-
-    def __hash__(self):
-        return hash(
-            ("and", tuple(hash(conjunct) for conjunct in self.conjuncts))
-        )
+        return cls.intern(conjuncts, conjuncts=conjuncts, symbol_set=frozenset(
+            ).union(*[conjunct.symbol_set for conjunct in conjuncts]))
 
     def __repr__(self):
         conjunctions = ", ".join(
@@ -114,8 +145,9 @@ class And(Sentence):
         return f"And({conjunctions})"
 
     def add(self, conjunct):
-        Sentence.validate(conjunct)
-        self.conjuncts.append(conjunct)
+        raise TypeError(
+            "sentences are immutable, use a KnowledgeBase to add facts"
+        )
 
     def evaluate(self, model):
         return all(conjunct.evaluate(model) for conjunct in self.conjuncts)
@@ -126,23 +158,19 @@ class And(Sentence):
         return " ∧ ".join([Sentence.parenthesize(conjunct.formula())
                            for conjunct in self.conjuncts])
 
-    def symbols(self):
-        return set.union(*[conjunct.symbols() for conjunct in self.conjuncts])
+    def expression(self, index):
+        if not self.conjuncts:
+            return "True"
+        return "(" + " and ".join([conjunct.expression(index)
+                                   for conjunct in self.conjuncts]) + ")"
 
 
 class Or(Sentence):
-    def __init__(self, *disjuncts):
+    def __new__(cls, *disjuncts):
         for disjunct in disjuncts:
             Sentence.validate(disjunct)
-        self.disjuncts = list(disjuncts)
-
-    def __eq__(self, other):
-        return isinstance(other, Or) and self.disjuncts == other.disjuncts
-
-    def __hash__(self):
-        return hash(
-            ("or", tuple(hash(disjunct) for disjunct in self.disjuncts))
-        )
+        return cls.intern(disjuncts, disjuncts=disjuncts, symbol_set=frozenset(
+            ).union(*[disjunct.symbol_set for disjunct in disjuncts]))
 
     def __repr__(self):
         disjuncts = ", ".join([str(disjunct) for disjunct in self.disjuncts])
@@ -157,24 +185,22 @@ class Or(Sentence):
         return " ∨  ".join([Sentence.parenthesize(disjunct.formula())
                             for disjunct in self.disjuncts])
 
-    def symbols(self):
-        return set.union(*[disjunct.symbols() for disjunct in self.disjuncts])
+    def expression(self, index):
+        if not self.disjuncts:
+            return "False"
+        return "(" + " or ".join([disjunct.expression(index)
+                                  for disjunct in self.disjuncts]) + ")"
 
 
 class Implication(Sentence):
-    def __init__(self, antecedent, consequent):
+    def __new__(cls, antecedent, consequent):
         Sentence.validate(antecedent)
         Sentence.validate(consequent)
-        self.antecedent = antecedent
-        self.consequent = consequent
-
-    def __eq__(self, other):
-        return (isinstance(other, Implication)
-                and self.antecedent == other.antecedent
-                and self.consequent == other.consequent)
-
-    def __hash__(self):
-        return hash(("implies", hash(self.antecedent), hash(self.consequent)))
+        return cls.intern(
+            (antecedent, consequent),
+            antecedent=antecedent, consequent=consequent,
+            symbol_set=antecedent.symbol_set | consequent.symbol_set
+        )
 
     def __repr__(self):
         return f"Implication({self.antecedent}, {self.consequent})"
@@ -188,24 +214,17 @@ class Implication(Sentence):
         consequent = Sentence.parenthesize(self.consequent.formula())
         return f"{antecedent} => {consequent}"
 
-    def symbols(self):
-        return set.union(self.antecedent.symbols(), self.consequent.symbols())
+    def expression(self, index):
+        return (f"(not {self.antecedent.expression(index)}"
+                f" or {self.consequent.expression(index)})")
 
 
 class Biconditional(Sentence):
-    def __init__(self, left, right):
+    def __new__(cls, left, right):
         Sentence.validate(left)
         Sentence.validate(right)
-        self.left = left
-        self.right = right
-
-    def __eq__(self, other):
-        return (isinstance(other, Biconditional)
-                and self.left == other.left
-                and self.right == other.right)
-
-    def __hash__(self):
-        return hash(("biconditional", hash(self.left), hash(self.right)))
+        return cls.intern((left, right), left=left, right=right,
+                          symbol_set=left.symbol_set | right.symbol_set)
 
     def __repr__(self):
         return f"Biconditional({self.left}, {self.right})"
@@ -221,43 +240,142 @@ class Biconditional(Sentence):
         right = Sentence.parenthesize(str(self.right))
         return f"{left} <=> {right}"
 
-    def symbols(self):
-        return set.union(self.left.symbols(), self.right.symbols())
-
-
-def model_check(knowledge, query):
-    """Checks if knowledge base entails query."""
-
-    def check_all(knowledge, query, symbols, model):
-        """Checks if knowledge base entails query, given a particular model."""
+    def expression(self, index):
+        return (f"(bool({self.left.expression(index)})"
+                f" == bool({self.right.expression(index)}))")
 
-        # If model has an assignment for each symbol
-        if not symbols:
 
-            # If knowledge base is true in model, then query must also be true
-            if knowledge.evaluate(model):
-                return query.evaluate(model)
-            return True
-        else:
+class KnowledgeBase():
+    """
+    A conjunction of facts that can grow while answering queries.
 
-            # Choose one of the remaining unused symbols
-            remaining = symbols.copy()
-            p = remaining.pop()
+    The models of the facts are enumerated the first time a query needs
+    them and then kept up to date as facts are added: a fact over known
+    symbols filters the models, and a fact with new symbols extends each
+    model with the values of those symbols that satisfy it.
+    """
 
-            # Create a model where the symbol is true
-            model_true = model.copy()
-            model_true[p] = True
+    def __init__(self, *facts):
+        self.facts = []
+        self.known = set()
+        self.order = []
+        self.index = {}
+        self.conjunction = None
+        self.satisfying = None
+        for fact in facts:
+            self.add(fact)
 
-            # Create a model where the symbol is false
-            model_false = model.copy()
-            model_false[p] = False
+    def __repr__(self):
+        return f"KnowledgeBase({', '.join(str(fact) for fact in self.facts)})"
+
+    def add(self, fact):
+        """Adds a fact to the knowledge base."""
+        Sentence.validate(fact)
+        if fact in self.known:
+            return
+        self.known.add(fact)
+        self.facts.append(fact)
+        self.conjunction = None
+
+        new = sorted(fact.symbol_set - self.index.keys())
+        for name in new:
+            self.index[name] = len(self.order)
+            self.order.append(name)
+
+        if self.satisfying is not None:
+            check = compile_sentence(fact, self.order)
+            extensions = list(itertools.product((True, False), repeat=len(new)))
+            self.satisfying = [
+                model + extension
+                for model in self.satisfying for extension in extensions
+                if check(model + extension)
+            ]
+
+    def sentence(self):
+        """Returns the conjunction of every fact as one sentence."""
+        if self.conjunction is None:
+            self.conjunction = And(*self.facts)
+        return self.conjunction
 
-            # Ensure entailment holds in both models
-            return (check_all(knowledge, query, remaining, model_true) and
-                    check_all(knowledge, query, remaining, model_false))
+    def symbols(self):
+        """Returns a set of all symbols in the knowledge base."""
+        return set(self.order)
+
+    def models(self):
+        """Returns every model of the facts, as tuples of truth values for
+        the symbols in self.order."""
+        if self.satisfying is None:
+            knowledge = compile_sentence(self.sentence(), self.order)
+            self.satisfying = [
+                model for model in itertools.product(
+                    (True, False), repeat=len(self.order)
+                ) if knowledge(model)
+            ]
+        return self.satisfying
+
+    def entails(self, query):
+        """Checks if the knowledge base entails query."""
+        return self.entails_all([query])[0]
+
+    def entails_all(self, queries):
+        """Returns a list of whether the knowledge base entails each query."""
+        for query in queries:
+            Sentence.validate(query)
+        if not all(query.symbol_set <= self.index.keys() for query in queries):
+            return model_check_all(self.sentence(), queries)
+        models = self.models()
+        return [all(query(model) for model in models)
+                for query in [compile_sentence(query, self.order)
+                              for query in queries]]
+
+
+def compile_sentence(sentence, symbols):
+    """Returns a function evaluating the sentence over a sequence of truth
+    values, one per name in symbols, without walking the sentence tree."""
+    index = {name: i for i, name in enumerate(symbols)}
+    try:
+        return eval(f"lambda m: {sentence.expression(index)}")
+    except (SyntaxError, RecursionError, MemoryError):
+
+        # Too deeply nested for the Python compiler
+        return lambda m: sentence.evaluate(dict(zip(symbols, m)))
 
-    # Get all symbols in both knowledge and query
-    symbols = set.union(knowledge.symbols(), query.symbols())
 
-    # Check that knowledge entails query
-    return check_all(knowledge, query, symbols, dict())
+def model_check(knowledge, query):
+    """Checks if knowledge base entails query."""
+    return model_check_all(knowledge, [query])[0]
+
+
+def model_check_all(knowledge, queries, stats=None):
+    """Checks which of queries knowledge base entails, enumerating the
+    models of the knowledge base only once for all of them.
+
+    If stats is a dict, it receives the number of models visited."""
+    if stats is None:
+        stats = {}
+
+    # Get all symbols in both knowledge and queries
+    symbols = sorted(knowledge.symbol_set.union(
+        *[query.symbol_set for query in queries]
+    ))
+    knowledge = compile_sentence(knowledge, symbols)
+    checks = [compile_sentence(query, symbols) for query in queries]
+
+    # A query stops being entailed at the first model of the knowledge base
+    # where it is false
+    entailed = [True] * len(queries)
+    pending = list(range(len(queries)))
+    stats["visited"] = 0
+    for model in itertools.product((True, False), repeat=len(symbols)):
+        if not pending:
+            break
+        stats["visited"] += 1
+        if knowledge(model):
+            remaining = []
+            for i in pending:
+                if checks[i](model):
+                    remaining.append(i)
+                else:
+                    entailed[i] = False
+            pending = remaining
+    return entailed
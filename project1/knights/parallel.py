@@ -0,0 +1,103 @@
+import itertools
+import math
+import multiprocessing
+
+from logic import compile_sentence
+
+# A worker looks at which queries are already refuted once per
+# 2 ** CHECK_BITS models
+CHECK_BITS = 12
+
+# Prefixes handed out per worker process, to even out their load
+PREFIXES_PER_PROCESS = 4
+
+# Compiled sentences and shared refuted flags of each worker, set in _attach
+worker_knowledge = None
+worker_queries = None
+worker_refuted = None
+
+
+def _attach(knowledge, queries, symbols, refuted):
+    """
+    Pool initializer: compiles the knowledge base and queries in this
+    worker process.
+    """
+    global worker_knowledge, worker_queries, worker_refuted
+    worker_knowledge = compile_sentence(knowledge, symbols)
+    worker_queries = [compile_sentence(query, symbols) for query in queries]
+    worker_refuted = refuted
+
+
+def _check_prefix(prefix, remaining):
+    """
+    Checks every model that starts with the truth values in `prefix`,
+    flagging each query false in a model of the knowledge base as refuted.
+    Stops early once every query is refuted, by this or another worker.
+    Returns the number of models visited.
+    """
+    pending = list(range(len(worker_queries)))
+    block = min(remaining, CHECK_BITS)
+    visited = 0
+    for middle in itertools.product((True, False), repeat=remaining - block):
+        pending = [i for i in pending if not worker_refuted[i]]
+        if not pending:
+            break
+        start = prefix + middle
+        for suffix in itertools.product((True, False), repeat=block):
+            model = start + suffix
+            if worker_knowledge(model):
+                for i in pending:
+                    if not worker_queries[i](model):
+                        worker_refuted[i] = 1
+                pending = [i for i in pending if not worker_refuted[i]]
+        visited += 2 ** block
+    return visited
+
+
+def _check_task(task):
+    return _check_prefix(*task)
+
+
+def parallel_model_check(knowledge, query, processes=None, split=None,
+                         stats=None):
+    """Checks if knowledge base entails query, across a process pool."""
+    return parallel_model_check_all(
+        knowledge, [query], processes, split, stats
+    )[0]
+
+
+def parallel_model_check_all(knowledge, queries, processes=None, split=None,
+                             stats=None):
+    """
+    Checks which of queries knowledge base entails, fixing the first
+    `split` symbols to each of their 2 ** split combinations and checking
+    the models under each combination in a pool of `processes` worker
+    processes. The pool is terminated as soon as every query is refuted.
+
+    If `stats` is a dict, it receives the number of models visited.
+    """
+    if stats is None:
+        stats = {}
+    symbols = sorted(knowledge.symbol_set.union(
+        *[query.symbol_set for query in queries]
+    ))
+    processes = processes or multiprocessing.cpu_count()
+    if split is None:
+        split = math.ceil(math.log2(processes * PREFIXES_PER_PROCESS))
+    split = min(split, len(symbols))
+
+    refuted = multiprocessing.RawArray("b", len(queries))
+    remaining = len(symbols) - split
+    tasks = [(prefix, remaining)
+             for prefix in itertools.product((True, False), repeat=split)]
+    stats["visited"] = 0
+    with multiprocessing.Pool(
+        processes,
+        initializer=_attach,
+        initargs=(knowledge, queries, symbols, refuted)
+    ) as pool:
+        for visited in pool.imap_unordered(_check_task, tasks):
+            stats["visited"] += visited
+            if all(refuted):
+                break
+    return [not flag for flag in refuted]
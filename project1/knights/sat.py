@@ -0,0 +1,436 @@
+import heapq
+
+from logic import And, Biconditional, Implication, Not, Or, Symbol
+
+
+class CNF():
+    """
+    Clauses in conjunctive normal form over integer variables.
+
+    Variables are numbered from 1 and a literal is a variable or its
+    negation. Symbols keep their own variable; every other subformula gets
+    a fresh variable defined equal to it (the Tseitin encoding), so the
+    clauses grow linearly with the sentence instead of exponentially.
+    """
+
+    def __init__(self):
+        self.variables = {}
+        self.names = [None]
+        self.clauses = []
+        self.literals = {}
+
+    def variable(self, name):
+        """Returns the variable of the symbol called name."""
+        if name not in self.variables:
+            self.variables[name] = self.new_variable(name)
+        return self.variables[name]
+
+    def new_variable(self, name=None):
+        """Returns a fresh variable."""
+        self.names.append(name)
+        return len(self.names) - 1
+
+    def add_clause(self, clause):
+        """Adds the disjunction of the literals in clause."""
+        self.clauses.append(list(clause))
+
+    def add(self, sentence):
+        """Adds clauses requiring the sentence to be true."""
+        if isinstance(sentence, And):
+            for conjunct in sentence.conjuncts:
+                self.add(conjunct)
+        elif isinstance(sentence, Or):
+            self.add_clause(self.literal(d) for d in sentence.disjuncts)
+        elif isinstance(sentence, Implication):
+            self.add_clause([-self.literal(sentence.antecedent),
+                             self.literal(sentence.consequent)])
+        elif isinstance(sentence, Not) and isinstance(sentence.operand, And):
+            self.add_clause(-self.literal(c) for c in sentence.operand.conjuncts)
+        elif isinstance(sentence, Not) and isinstance(sentence.operand, Or):
+            for disjunct in sentence.operand.disjuncts:
+                self.add_clause([-self.literal(disjunct)])
+        else:
+            self.add_clause([self.literal(sentence)])
+
+    def literal(self, sentence):
+        """Returns a literal equal to the sentence, defining it if needed."""
+        if isinstance(sentence, Symbol):
+            return self.variable(sentence.name)
+        if isinstance(sentence, Not):
+            return -self.literal(sentence.operand)
+        if sentence in self.literals:
+            return self.literals[sentence]
+
+        if isinstance(sentence, And):
+            parts = [self.literal(c) for c in sentence.conjuncts]
+            v = self.new_variable()
+            for part in parts:
+                self.add_clause([-v, part])
+            self.add_clause([v] + [-part for part in parts])
+        elif isinstance(sentence, (Or, Implication)):
+            if isinstance(sentence, Or):
+                parts = [self.literal(d) for d in sentence.disjuncts]
+            else:
+                parts = [-self.literal(sentence.antecedent),
+                         self.literal(sentence.consequent)]
+            v = self.new_variable()
+            for part in parts:
+                self.add_clause([v, -part])
+            self.add_clause([-v] + parts)
+        elif isinstance(sentence, Biconditional):
+            a = self.literal(sentence.left)
+            b = self.literal(sentence.right)
+            v = self.new_variable()
+            self.add_clause([-v, -a, b])
+            self.add_clause([-v, a, -b])
+            self.add_clause([v, a, b])
+            self.add_clause([v, -a, -b])
+        else:
+            raise TypeError("must be a logical sentence")
+
+        self.literals[sentence] = v
+        return v
+
+
+class Solver(CNF):
+    """
+    Conflict-driven clause learning SAT solver.
+
+    Each clause watches two of its literals and is only looked at when one
+    of them becomes false, conflicts are analysed back to their first
+    unique implication point to learn a clause and jump back, and
+    decisions go to the most active variable with its last value.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.ok = True
+        self.watches = {}
+        self.value = [0]
+        self.level = [0]
+        self.reason = [None]
+        self.activity = [0.0]
+        self.polarity = [False]
+        self.order = []
+        self.increment = 1.0
+        self.trail = []
+        self.trail_limits = []
+        self.head = 0
+        self.stats = {"decisions": 0, "propagations": 0, "conflicts": 0}
+
+    def new_variable(self, name=None):
+        v = super().new_variable(name)
+        self.watches[v] = []
+        self.watches[-v] = []
+        self.value.append(0)
+        self.level.append(0)
+        self.reason.append(None)
+        self.activity.append(0.0)
+        self.polarity.append(False)
+        heapq.heappush(self.order, (0.0, v))
+        return v
+
+    def add_clause(self, clause):
+        """Adds a clause, simplified by what is already known."""
+        if self.trail_limits:
+            self.backtrack(0)
+        literals = []
+        for literal in clause:
+            value = self.truth(literal)
+            if value is True or -literal in literals:
+                return
+            if value is None and literal not in literals:
+                literals.append(literal)
+        self.clauses.append(literals)
+        if not literals:
+            self.ok = False
+        elif len(literals) == 1:
+            self.assign(literals[0], None)
+            if self.propagate() is not None:
+                self.ok = False
+        else:
+            self.watch(literals)
+
+    def watch(self, clause):
+        self.watches[clause[0]].append(clause)
+        self.watches[clause[1]].append(clause)
+
+    def truth(self, literal):
+        """Returns the value of a literal, or None if it is unassigned."""
+        value = self.value[abs(literal)]
+        if value == 0:
+            return None
+        return (value > 0) == (literal > 0)
+
+    def assign(self, literal, reason):
+        v = abs(literal)
+        self.value[v] = 1 if literal > 0 else -1
+        self.level[v] = len(self.trail_limits)
+        self.reason[v] = reason
+        self.trail.append(literal)
+
+    def propagate(self):
+        """
+        Assigns every literal forced by a clause with one unassigned literal
+        left. Returns a clause that has become false, if any.
+        """
+        while self.head < len(self.trail):
+            false = -self.trail[self.head]
+            self.head += 1
+            self.stats["propagations"] += 1
+            watching = self.watches[false]
+            kept = []
+            for n, clause in enumerate(watching):
+                if clause[0] == false:
+                    clause[0], clause[1] = clause[1], clause[0]
+                other = clause[0]
+                if self.truth(other) is True:
+                    kept.append(clause)
+                    continue
+
+                # Look for another literal that is not false to watch
+                for k in range(2, len(clause)):
+                    if self.truth(clause[k]) is not False:
+                        clause[1], clause[k] = clause[k], clause[1]
+                        self.watches[clause[1]].append(clause)
+                        break
+                else:
+                    kept.append(clause)
+                    if self.truth(other) is False:
+                        kept.extend(watching[n + 1:])
+                        self.watches[false] = kept
+                        return clause
+                    self.assign(other, clause)
+            self.watches[false] = kept
+        return None
+
+    def analyze(self, conflict):
+        """
+        Returns the clause learned from a conflict and the decision level to
+        jump back to.
+        """
+        level = len(self.trail_limits)
+        seen = set()
+        learned = [None]
+        pending = 0
+        literal = None
+        index = len(self.trail) - 1
+        clause = conflict
+        while True:
+            for q in clause:
+                v = abs(q)
+                if q == literal or v in seen or self.level[v] == 0:
+                    continue
+                seen.add(v)
+                self.bump(v)
+                if self.level[v] == level:
+                    pending += 1
+                else:
+                    learned.append(q)
+
+            # Step back along the trail to the next literal in the conflict
+            while abs(self.trail[index]) not in seen:
+                index -= 1
+            literal = self.trail[index]
+            index -= 1
+            pending -= 1
+            if pending == 0:
+                break
+            clause = self.reason[abs(literal)]
+        learned[0] = -literal
+
+        if len(learned) == 1:
+            return learned, 0
+        deepest = max(range(1, len(learned)),
+                      key=lambda i: self.level[abs(learned[i])])
+        learned[1], learned[deepest] = learned[deepest], learned[1]
+        return learned, self.level[abs(learned[1])]
+
+    def bump(self, v):
+        self.activity[v] += self.increment
+        if self.activity[v] > 1e100:
+            self.activity = [a * 1e-100 for a in self.activity]
+            self.increment *= 1e-100
+            self.order = [(-a, u) for u, a in enumerate(self.activity)
+                          if u and self.value[u] == 0]
+            heapq.heapify(self.order)
+        elif self.value[v] == 0:
+            heapq.heappush(self.order, (-self.activity[v], v))
+
+    def backtrack(self, level):
+        """Undoes every assignment made after the decision level."""
+        if len(self.trail_limits) <= level:
+            return
+        start = self.trail_limits[level]
+        for literal in self.trail[start:]:
+            v = abs(literal)
+            self.value[v] = 0
+            self.reason[v] = None
+            self.polarity[v] = literal > 0
+            heapq.heappush(self.order, (-self.activity[v], v))
+        del self.trail[start:]
+        del self.trail_limits[level:]
+        self.head = start
+
+        # Drop the stale entries that pile up in the order heap
+        if len(self.order) > 4 * len(self.value):
+            self.order = [(-self.activity[v], v)
+                          for v in range(1, len(self.value)) if self.value[v] == 0]
+            heapq.heapify(self.order)
+
+    def decide(self):
+        """Returns the unassigned variable to branch on, or None."""
+        while self.order:
+            _, v = heapq.heappop(self.order)
+            if self.value[v] == 0:
+                return v
+        return None
+
+    def solve(self, assumptions=()):
+        """
+        Returns True if the clauses can all be true with every literal in
+        assumptions true, False otherwise. After True, model returns the
+        assignment found.
+        """
+        if not self.ok:
+            return False
+        self.backtrack(0)
+        if self.propagate() is not None:
+            self.ok = False
+            return False
+
+        restart = 100
+        conflicts = 0
+        while True:
+            conflict = self.propagate()
+            if conflict is not None:
+                self.stats["conflicts"] += 1
+                conflicts += 1
+                if not self.trail_limits:
+                    self.ok = False
+                    return False
+                learned, level = self.analyze(conflict)
+                self.backtrack(level)
+                self.clauses.append(learned)
+                if len(learned) > 1:
+                    self.watch(learned)
+                self.assign(learned[0], learned if len(learned) > 1 else None)
+                self.increment *= 1.05
+                continue
+
+            if conflicts >= restart:
+                conflicts = 0
+                restart = int(restart * 1.5)
+                self.backtrack(0)
+                continue
+
+            # Assumptions are decided first, one per decision level
+            literal = None
+            while len(self.trail_limits) < len(assumptions):
+                assumption = assumptions[len(self.trail_limits)]
+                value = self.truth(assumption)
+                if value is False:
+                    self.backtrack(0)
+                    return False
+                self.trail_limits.append(len(self.trail))
+                if value is None:
+                    literal = assumption
+                    break
+            if literal is None:
+                v = self.decide()
+                if v is None:
+                    self.solution = list(self.value)
+                    self.backtrack(0)
+                    return True
+                literal = v if self.polarity[v] else -v
+                self.trail_limits.append(len(self.trail))
+            self.stats["decisions"] += 1
+            self.assign(literal, None)
+
+    def model(self):
+        """Returns the last solution as a dict of symbol names to values."""
+        return {name: self.solution[v] > 0
+                for name, v in self.variables.items()}
+
+    def holds(self, literal):
+        """Checks if a literal is true in the last solution."""
+        return (self.solution[abs(literal)] > 0) == (literal > 0)
+
+    def entails(self, query):
+        """Checks if the clauses entail the query."""
+        return self.entails_all([query])[0]
+
+    def entails_all(self, queries):
+        """
+        Returns a list of whether the clauses entail each query. Every
+        counter-model found settles all the other queries false in it too.
+        """
+        literals = [self.literal(query) for query in queries]
+        entailed = [None] * len(literals)
+        for i, literal in enumerate(literals):
+            if entailed[i] is not None:
+                continue
+            if not self.solve([-literal]):
+                entailed[i] = True
+                continue
+            for j in range(i, len(literals)):
+                if entailed[j] is None and not self.holds(literals[j]):
+                    entailed[j] = False
+        return entailed
+
+    def backbone(self):
+        """
+        Returns a dict of the symbols that have the same value in every
+        solution, mapped to that value, or None if there is no solution.
+        """
+        if not self.solve():
+            return None
+        candidates = {v: self.solution[v] > 0
+                      for v in self.variables.values()}
+        backbone = {}
+        while candidates:
+            v, value = candidates.popitem()
+            literal = v if value else -v
+            if not self.solve([-literal]):
+                backbone[self.names[v]] = value
+                continue
+
+            # Symbols that flipped in the new solution are not in the backbone
+            for u in [u for u, value in candidates.items()
+                      if (self.solution[u] > 0) != value]:
+                del candidates[u]
+        return backbone
+
+
+def to_cnf(sentence):
+    """Returns the Tseitin encoding of sentence as a CNF."""
+    cnf = CNF()
+    cnf.add(sentence)
+    return cnf
+
+
+def sat_check(knowledge, query):
+    """Checks if knowledge base entails query, using a SAT solver."""
+    return sat_check_all(knowledge, [query])[0]
+
+
+def sat_check_all(knowledge, queries, stats=None):
+    """Checks which of queries knowledge base entails, using one SAT solver
+    for all of them.
+
+    If stats is a dict, it receives the solver's decisions, propagations
+    and conflicts."""
+    solver = Solver()
+    solver.add(knowledge)
+    entailed = solver.entails_all(queries)
+    if stats is not None:
+        stats.update(solver.stats)
+    return entailed
+
+
+def backbone(knowledge):
+    """Returns a dict of the symbols whose value knowledge base entails,
+    mapped to that value, or None if knowledge base is unsatisfiable."""
+    solver = Solver()
+    solver.add(knowledge)
+    return solver.backbone()
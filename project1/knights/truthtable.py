@@ -0,0 +1,126 @@
+import numpy as np
+
+from logic import And, Biconditional, Implication, Not, Or, Symbol
+
+# Models evaluated per pass are 2 ** CHUNK_BITS, one bit each
+CHUNK_BITS = 20
+
+ONES = np.uint64(0xFFFFFFFFFFFFFFFF)
+
+# Bit b of a word is set in column i when bit i of b is, for i < 6
+PATTERNS = [
+    np.uint64(0xAAAAAAAAAAAAAAAA),
+    np.uint64(0xCCCCCCCCCCCCCCCC),
+    np.uint64(0xF0F0F0F0F0F0F0F0),
+    np.uint64(0xFF00FF00FF00FF00),
+    np.uint64(0xFFFF0000FFFF0000),
+    np.uint64(0xFFFFFFFF00000000),
+]
+
+
+class TruthTable():
+    """
+    The truth table of a set of symbols, evaluated a chunk at a time.
+
+    Model m gives symbol i the value of bit i of m. A chunk holds
+    2 ** CHUNK_BITS consecutive models packed 64 to a uint64 word, so a
+    sentence is evaluated over a whole chunk by a few vectorized bitwise
+    operations per connective.
+    """
+
+    def __init__(self, symbols):
+        self.symbols = list(symbols)
+        self.index = {name: i for i, name in enumerate(self.symbols)}
+        n = len(self.symbols)
+        self.bits = min(n, CHUNK_BITS)
+        self.chunks = 2 ** (n - self.bits)
+        self.words = max(2 ** self.bits // 64, 1)
+
+        # Fewer than 64 models leave the high bits of the only word unused
+        self.valid = np.full(self.words, ONES, dtype=np.uint64)
+        if self.bits < 6:
+            self.valid[0] = np.uint64(2 ** 2 ** self.bits - 1)
+
+    def column(self, i, chunk):
+        """Returns the words of symbol i over a chunk."""
+        if i < 6:
+            return np.full(self.words, PATTERNS[i], dtype=np.uint64)
+        if i < self.bits:
+            word = np.arange(self.words) >> (i - 6) & 1
+            return np.where(word == 1, ONES, np.uint64(0))
+        if chunk >> (i - self.bits) & 1:
+            return np.full(self.words, ONES, dtype=np.uint64)
+        return np.zeros(self.words, dtype=np.uint64)
+
+    def evaluate(self, sentence, chunk, cache):
+        """Returns the words of sentence over a chunk, reusing the values
+        of subformulas already in cache."""
+        if sentence in cache:
+            return cache[sentence]
+        if isinstance(sentence, Symbol):
+            try:
+                value = self.column(self.index[sentence.name], chunk)
+            except KeyError:
+                raise Exception(f"variable {sentence.name} not in model")
+        elif isinstance(sentence, Not):
+            value = ~self.evaluate(sentence.operand, chunk, cache)
+        elif isinstance(sentence, And):
+            value = np.full(self.words, ONES, dtype=np.uint64)
+            for conjunct in sentence.conjuncts:
+                value &= self.evaluate(conjunct, chunk, cache)
+        elif isinstance(sentence, Or):
+            value = np.zeros(self.words, dtype=np.uint64)
+            for disjunct in sentence.disjuncts:
+                value |= self.evaluate(disjunct, chunk, cache)
+        elif isinstance(sentence, Implication):
+            value = (~self.evaluate(sentence.antecedent, chunk, cache)
+                     | self.evaluate(sentence.consequent, chunk, cache))
+        elif isinstance(sentence, Biconditional):
+            value = ~(self.evaluate(sentence.left, chunk, cache)
+                      ^ self.evaluate(sentence.right, chunk, cache))
+        else:
+            raise TypeError("must be a logical sentence")
+        cache[sentence] = value
+        return value
+
+
+def truth_table_check(knowledge, query):
+    """Checks if knowledge base entails query, using a vectorized truth
+    table."""
+    return truth_table_check_all(knowledge, [query])[0]
+
+
+def truth_table_check_all(knowledge, queries, stats=None):
+    """Checks which of queries knowledge base entails, evaluating each
+    chunk of the truth table once for all of them.
+
+    If stats is a dict, it receives the number of models visited."""
+    if stats is None:
+        stats = {}
+    table = TruthTable(sorted(knowledge.symbol_set.union(
+        *[query.symbol_set for query in queries]
+    )))
+    entailed = [True] * len(queries)
+    stats["visited"] = 0
+    for chunk in range(table.chunks):
+        stats["visited"] += 2 ** table.bits
+        cache = {}
+        models = table.evaluate(knowledge, chunk, cache) & table.valid
+        if not models.any():
+            continue
+        for i, query in enumerate(queries):
+            if entailed[i] and (models & ~table.evaluate(query, chunk, cache)).any():
+                entailed[i] = False
+        if not any(entailed):
+            break
+    return entailed
+
+
+def count_models(sentence):
+    """Returns the number of models of sentence over its symbols."""
+    table = TruthTable(sorted(sentence.symbol_set))
+    count = 0
+    for chunk in range(table.chunks):
+        words = table.evaluate(sentence, chunk, {}) & table.valid
+        count += int(np.unpackbits(words.view(np.uint8)).sum())
+    return count